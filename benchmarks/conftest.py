@@ -0,0 +1,19 @@
+import pytest
+
+from snake import config
+from snake.dtypes import Validation
+from snake.instrumentation import METRICS
+
+SIZES = [8, 16, 32, 64, 128]
+
+
+@pytest.fixture(autouse=True)
+def _production_settings(monkeypatch):
+    # measure what a game costs, not the test suite's full cycle validation
+    monkeypatch.setattr(config, "CYCLE_VALIDATION", Validation.OFF)
+    monkeypatch.setattr(METRICS, "enabled", False)
+
+
+@pytest.fixture(params=SIZES, ids=lambda size: f"{size}x{size}")
+def size(request) -> int:
+    return request.param
@@ -0,0 +1,103 @@
+import pytest
+
+from snake.ai_cycle import (
+    Cycle,
+    HamiltonianCycle,
+    _admissible_directions,
+    join_adjoint_cycles,
+    shortcut,
+)
+from snake.cycle_array import ArrayCycle
+from snake.game import Field
+
+
+def _split_field(size: int) -> Field:
+    return Field(size // 2 - 1, size // 2)
+
+
+def _cycle(size: int, compact: bool):
+    cycle = HamiltonianCycle(size, size)
+    return ArrayCycle.from_cycle(cycle, (size, size)) if compact else cycle
+
+
+def test_hamiltonian_cycle(benchmark, size):
+    cycle = benchmark(HamiltonianCycle, size, size)
+
+    assert len(cycle) == size * size
+
+
+def test_array_cycle(benchmark, size):
+    cycle = HamiltonianCycle(size, size)
+
+    array_cycle = benchmark(ArrayCycle.from_cycle, cycle, (size, size))
+
+    assert len(array_cycle) == size * size
+
+
+@pytest.mark.parametrize("compact", [False, True], ids=["dict", "array"])
+def test_split(benchmark, size, compact):
+    cycle = _cycle(size, compact)
+
+    cycle1, cycle2 = benchmark(cycle.split, _split_field(size))
+
+    assert len(cycle1) + len(cycle2) == size * size
+
+
+@pytest.mark.parametrize("compact", [False, True], ids=["dict", "array"])
+def test_join_adjoint_cycles(benchmark, size, compact):
+    cycle = _cycle(size, compact)
+    field = _split_field(size)
+
+    def setup():
+        cycle1, cycle2 = cycle.split(field)
+        return (cycle1, cycle2, field), {}
+
+    joined = benchmark.pedantic(
+        join_adjoint_cycles, setup=setup, rounds=20, warmup_rounds=1
+    )
+
+    assert len(joined) == size * size
+
+
+def test_cycle_add(benchmark, size):
+    cycle1, cycle2 = HamiltonianCycle(size, size).split(_split_field(size))
+
+    def setup():
+        left = Cycle._unchecked(list(cycle1), list(cycle1.values()))
+        return (left, cycle2), {}
+
+    joined = benchmark.pedantic(Cycle.__add__, setup=setup, rounds=20)
+
+    assert len(joined) == size * size
+
+
+@pytest.mark.parametrize("compact", [False, True], ids=["dict", "array"])
+def test_dist(benchmark, size, compact):
+    cycle = _cycle(size, compact)
+    start = Field(size // 2, size // 2)
+    # the field right before 'start' is the farthest one along the cycle
+    end = next(field for field in cycle if field + cycle[field] == start)
+
+    dist = benchmark(cycle.dist, start, end)
+
+    assert dist == size * size - 1
+
+
+@pytest.mark.parametrize("size", [32, 64, 128], ids=["32x32", "64x64", "128x128"])
+def test_shortcut(benchmark, size):
+    """One shortcut which skips four fields and joins them back about half way
+    around the cycle. Its cost is the same on every board size."""
+    cycle = _cycle(size, compact=True)
+    field = Field(3, 2)
+    target = field + (_admissible_directions(field) - {cycle[field]}).pop()
+
+    def setup():
+        _cycle = cycle.copy()
+        _ = _cycle.pos
+        return (_cycle, field, target, lambda *_: False), {}
+
+    splice = benchmark.pedantic(shortcut, setup=setup, rounds=50, warmup_rounds=1)
+    benchmark.group = "shortcut"
+    benchmark.extra_info["joint"] = cycle.dist(target, splice.joint)
+
+    assert splice.skipped == 4
@@ -0,0 +1,72 @@
+import random
+
+import numpy as np
+import pytest
+
+from snake.ai_cycle import HamiltonianCycle
+from snake.batch import BatchBoard
+from snake.cycle_array import ArrayCycle
+from snake.game import Board
+from snake.simulator import Simulator
+
+MOVES = 10
+
+
+def test_new_apple(benchmark, size):
+    board = Board((size, size), rng=random.Random(0))
+
+    apple = benchmark(board.new_apple)
+
+    assert apple in board
+
+
+@pytest.mark.parametrize("compact", [False, True], ids=["dict", "array"])
+def test_optimize_latency(benchmark, size, compact):
+    """``MOVES`` moves of the cycle AI, i.e. per move latency times ``MOVES``."""
+
+    def setup():
+        return (Simulator((size, size), "cycle", seed=0, compact=compact),), {}
+
+    def play(simulator):
+        for _ in range(MOVES):
+            simulator.step()
+        return simulator
+
+    simulator = benchmark.pedantic(play, setup=setup, rounds=3)
+    benchmark.extra_info["moves"] = MOVES
+
+    assert simulator.steps == MOVES
+
+
+@pytest.mark.parametrize("size", [8, 16], ids=["8x8", "16x16"])
+def test_cycle_game(benchmark, size):
+    def play():
+        return Simulator((size, size), "cycle", seed=0).run()
+
+    stats = benchmark.pedantic(play, rounds=3)
+
+    assert stats.won
+
+
+@pytest.mark.parametrize("ai", ["snake", "snake_v2", "snake_v3", "snake_v4"])
+def test_search_game(benchmark, ai):
+    def play():
+        return Simulator((8, 8), ai, seed=0).run(max_steps=1000)
+
+    stats = benchmark.pedantic(play, rounds=3)
+
+    assert stats.steps > 0
+
+
+@pytest.mark.parametrize("size", [8, 16], ids=["8x8", "16x16"])
+def test_batch_cycle_games(benchmark, size):
+    cycle = ArrayCycle.from_cycle(HamiltonianCycle(size, size), (size, size))
+
+    def play():
+        board = BatchBoard(64, (size, size), seed=0)
+        board.run_cycle(cycle)
+        return board
+
+    board = benchmark.pedantic(play, rounds=3)
+
+    assert np.all(board.won)
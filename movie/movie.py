@@ -1,3 +1,3 @@
 import snake
 
-snake.run(wait=True, screenshot=True, size=(16, 10))
+snake.run(wait=True, screenshot=True)
@@ -5,4 +5,15 @@ from . import config
 # from . import dtypes
 # from . import exceptions
 from . import game
-from .main import run
+from .simulator import GameStats, Simulator
+
+__all__ = ["GameStats", "Simulator", "run"]
+
+
+def __getattr__(name: str):
+    # pygame is only imported when the interactive game is requested
+    if name == "run":
+        from .main import run
+
+        return run
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
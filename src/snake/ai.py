@@ -1,9 +1,11 @@
 from collections import deque
-from typing import Callable, Optional
+from typing import Optional
 
-from .dtypes import Content
-from .exceptions import StopSearch
-from .game import Board, Direction, Field, Snake
+from .exceptions import LoseError
+from .game import ENTERABLE, Board, Direction, Field, Snake
+from .instrumentation import count
+from .planner import Planner
+from .search import PathSearch, plan_is_safe
 
 
 class BaseAI:
@@ -29,96 +31,41 @@ class BaseAI:
 
 
 class SnakeAI(BaseAI):
-    def search_best_direction(self) -> Optional[Direction]:
-        field = self.head
-        visited: list[Field] = []
+    def __init__(self, board: Board):
+        super().__init__(board)
+        self._path_search = PathSearch(board.shape)
 
-        if len(self._directions) == self.apple.dist(field):
+    def search_best_direction(self) -> Optional[Direction]:
+        if plan_is_safe(self.board, self._directions):
+            count("plan reused")
             return self._directions.popleft()
 
-        self._directions = deque([])
-
-        try:
-            self._search(field, self.apple, self.snake.direction, visited)
-        except StopSearch:
-            # print("there you are")
-            return self._directions.popleft()
-        else:
+        path = self._path_search.search(self.board, self.snake.direction)
+        if path is None:
+            self._directions = deque([])
             return None
-            # pass
-            # print("Ohhhh no")
-
-    def _search(
-        self, start: Field, goal: Field, direction: Direction, visited: list[Field]
-    ) -> None:
-        if start == goal:
-            raise StopSearch
-
-        visited.append(start)
-
-        directions = list(
-            filter(
-                lambda d: (d != direction.opposite())
-                and (start + d not in visited)
-                and (start + d in self.board)
-                and (self.board[start + d] != Content.SNAKE),
-                Direction,
-            )
-        )
-
-        directions = sorted(
-            directions,
-            key=lambda d: 1
-            if (d == direction)
-            and (self.apple.dist(start + direction.opposite()) < self.apple.dist(start))
-            else 0,
-        )
-        directions = sorted(directions, key=lambda d: self.apple.dist(start + d))
-        for _direction in directions:
-            self._directions.append(_direction)
-            self._search(start + _direction, goal, _direction, visited=visited)
-            _ = self._directions.pop()
+
+        self._directions = deque(path)
+        return self._directions.popleft()
 
 
 class SnakeAIv2(BaseAI):
-    def search_best_direction(self) -> Direction:
-        field = self.head
-        visited: list[Field] = []
+    def __init__(self, board: Board):
+        super().__init__(board)
+        self._path_search = PathSearch(board.shape, admissible=True)
 
-        if len(self._directions) == self.apple.dist(field):
+    def search_best_direction(self) -> Direction:
+        if plan_is_safe(self.board, self._directions):
+            count("plan reused")
             return self._directions.popleft()
 
-        self._directions = deque([])
-
-        try:
-            self._search(field, self.apple, self.snake.direction, visited)
-        except StopSearch:
-            return self._directions.popleft()
-        else:
+        path = self._path_search.search(self.board, self.snake.direction)
+        if path is None:
+            self._directions = deque([])
             return self.stay_alive()
 
-    def _search(
-        self, start: Field, goal: Field, direction: Direction, visited: list[Field]
-    ) -> None:
-        if start == goal:
-            raise StopSearch
-
-        visited.append(start)
-
-        directions = self._get_admissible_directions(start) - {direction.opposite()}
-        directions &= self._get_alive_directions(start)
-        directions &= self._get_unvisited_directions(start, visited)
-
-        # directions = sorted(
-        #     directions,
-        #     key=lambda d: (d == direction)
-        #     and (self.apple.dist(self.head) < self.apple.dist(self.head + d)),
-        # )
-        # directions = sorted(directions, key=lambda d: self.apple.dist(start + d))
-        for _direction in self._sort_directions(start, direction, directions):
-            self._directions.append(_direction)
-            self._search(start + _direction, goal, _direction, visited=visited)
-            _ = self._directions.pop()
+        self._directions = deque(path)
+        return self._directions.popleft()
 
     def _get_admissible_directions(self, field: Field) -> set[Direction]:
         return {
@@ -127,38 +74,32 @@ class SnakeAIv2(BaseAI):
         }
 
     def _get_alive_directions(self, field: Field) -> set[Direction]:
+        board = self.board
         return {
             direction
             for direction in Direction
-            if (field + direction in self.board)
-            and (self.board[field + direction] != Content.SNAKE)
-        }
-
-    def _get_unvisited_directions(self, field: Field, visited: list[Field]):
-        return {
-            direction for direction in Direction if field + direction not in visited
+            if board.grid[board.cell(field + direction)] in ENTERABLE
         }
 
     def stay_alive(self):
-        print("Staying alive!")
+        count("staying alive")
         directions = self._get_admissible_directions(self.head)
         directions -= {self.snake.direction.opposite()}
         directions &= self._get_alive_directions(self.head)
-        return directions.pop()
-
-    def _sort_directions(
-        self, field: Field, cur_direction: Direction, directions: set[Direction]
-    ) -> list[Direction]:
-        def distance(direction: Direction) -> int:
-            return self.apple.dist(field + direction)
-
-        def sort_by_direction(direction: Direction) -> int:
-            if direction == cur_direction:
-                return 0
-            if distance(direction) < self.apple.dist(field):
-                return -1
-            if distance(direction) > self.apple.dist(field):
-                return 1
-            return 0
-
-        return sorted(sorted(directions, key=sort_by_direction), key=distance)
+        # keep going if possible, otherwise turn in a fixed order
+        for direction in (self.snake.direction, *Direction):
+            if direction in directions:
+                return direction
+        raise LoseError
+
+
+class SnakeAIv4(SnakeAIv2):
+    def __init__(self, board: Board):
+        super().__init__(board)
+        self._planner = Planner(board.shape, admissible=True)
+
+    def search_best_direction(self) -> Direction:
+        direction = self._planner.next_direction(self.board)
+        if direction is None:
+            return self.stay_alive()
+        return direction
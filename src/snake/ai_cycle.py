@@ -1,20 +1,30 @@
+import copy
+import time
 from collections import deque
-from itertools import product
-from typing import Optional
+from itertools import islice, product
+from typing import Callable, Iterable, Iterator, Optional, Union
 
 import numpy as np
-import pygame as pg
 
 from .ai import BaseAI
-from .config import FIELD_PX
-from .dtypes import Color, Content
+from .cycle_array import (
+    ArrayCycle,
+    array_join_points,
+    array_joints,
+    array_shortcuts,
+    join_adjoint_array_cycles,
+)
 from .exceptions import (
     CycleError,
     InvalidCycleError,
+    JoinError,
+    LoseError,
     NonAdjacentCyclesError,
-    StopSearch,
 )
-from .game import Board, Direction, Field, Snake
+from .game import ENTERABLE, Board, Direction, Field, Fields, Snake
+from .instrumentation import count, timed
+from .search import PathSearch, plan_is_safe
+from .validation import validate
 
 
 def _admissible_directions(field: Field) -> set[Direction]:
@@ -25,11 +35,103 @@ def _admissible_directions(field: Field) -> set[Direction]:
 
 
 class Cycle(dict[Field, Direction]):
+    """The direction of the successor of every field of a cycle.
+
+    Every write bumps ``version``. The position of every field along the cycle is
+    walked once per version and cached, so ``dist`` is a lookup. A splice which only
+    reorders the fields between two fields patches the cache with ``renumber``
+    instead of dropping it.
+    """
+
+    _version = 0
+    _positions: Optional[dict[Field, int]] = None
+    _positions_version = -1
+
     def __init__(self, fields: list[Field], directions: list[Direction]):
         super().__init__(
             {field: direction for field, direction in zip(fields, directions)}
         )
-        self.is_valid_or_raise()
+        self.validate()
+
+    @classmethod
+    def _unchecked(cls, fields: list[Field], directions: list[Direction]):
+        cycle = cls.__new__(cls)
+        dict.__init__(cycle, zip(fields, directions))
+        return cycle
+
+    def copy(self) -> "Cycle":
+        cycle = self.__class__.__new__(self.__class__)
+        dict.update(cycle, self)
+        if self._positions is not None and self._positions_version == self._version:
+            cycle._positions = self._positions.copy()
+            cycle._positions_version = cycle._version
+        return cycle
+
+    def __setitem__(self, field: Field, direction: Direction):
+        super().__setitem__(field, direction)
+        self._version += 1
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def positions(self) -> dict[Field, int]:
+        """The position of every field along the cycle, from an arbitrary start."""
+        if self._positions is None or self._positions_version != self._version:
+            positions = {}
+            if self:
+                start = next(iter(self))
+                field, position = start, 0
+                while field not in positions:
+                    positions[field] = position
+                    field += self[field]
+                    position += 1
+            self._positions = positions
+            self._positions_version = self._version
+        return self._positions
+
+    def renumber(
+        self,
+        version: int,
+        start: Field,
+        end: Field,
+        relinked: Iterable[Field] = (),
+    ) -> Optional[list[tuple[Field, int]]]:
+        """Patch the positions after a splice which reordered the fields between
+        ``start`` and ``end``, and nothing else, since ``version``.
+
+        ``relinked`` are the fields whose successor the splice changed, the walk
+        doesn't need them.
+
+        Returns the old positions for ``restore``, or ``None`` if the positions were
+        not cached at ``version``.
+        """
+        if self._positions is None or self._positions_version != version:
+            return None
+
+        positions = self._positions
+        journal = []
+        position = positions[start]
+        field = start + self[start]
+        while field != end:
+            position += 1
+            journal.append((field, positions[field]))
+            positions[field] = position % len(self)
+            field += self[field]
+        self._positions_version = self._version
+        return journal
+
+    def restore(self, version: int, journal: Optional[list[tuple[Field, int]]]):
+        """Undo ``renumber`` after the splice was rolled back.
+
+        ``version`` is the version the ``journal`` belongs to.
+        """
+        if self._positions is None or self._positions_version != version:
+            return
+
+        for field, position in journal or []:
+            self._positions[field] = position
+        self._positions_version = self._version
 
     def join(self, other, *, at: Field):
         pass
@@ -52,7 +154,7 @@ class Cycle(dict[Field, Direction]):
 
                     if field in self:
                         break
-            self.is_valid_or_raise()
+            self.validate()
             return self
 
         neighbors = {field + d for field in set(other) for d in Direction}
@@ -88,25 +190,22 @@ class Cycle(dict[Field, Direction]):
 
         return self + other
 
+    @timed("dist")
     def dist(self, start: Field, end: Field) -> float:
-        self.is_valid_or_raise()
+        self.validate()
 
         if start == end:
             return 0
-        cur = start
-        dist = 0
-        while cur != end:
-            cur += self[cur]
-            dist += 1
-
-            if cur == end:
-                return dist
-            if cur == start:
-                return np.nan
-        raise ValueError("idk how you get here, this should not happen")
-
+        if start not in self:
+            raise KeyError(start)
+        positions = self.positions()
+        if end not in positions:
+            return np.nan
+        return (positions[end] - positions[start]) % len(self)
+
+    @timed("is_valid_or_raise")
     def is_valid_or_raise(self):
-        copy = self.copy()
+        copy = dict(self)
 
         for field in self:
             if not isinstance(field, Field):
@@ -139,40 +238,79 @@ class Cycle(dict[Field, Direction]):
                 f"it is not possible to reach all fields starting from {start}."
             )
 
-    def draw(self, surface: pg.Surface):
-        for field, direction in self.items():
-            x1, y1 = field.rect.center
-            x2, y2 = (field + direction).rect.center
+    def check_splice(self, fields: Iterable[Field]):
+        targets = set()
+        for field in fields:
+            if field not in self:
+                raise InvalidCycleError(f"{field} is not part of the cycle.")
+            target = field + self[field]
+            if target not in self:
+                raise InvalidCycleError(
+                    f"{field} points to {target} which does not exist."
+                )
+            if target in targets:
+                raise InvalidCycleError(f"several fields point to {target}")
+            targets.add(target)
+
+    def validate(self, fields: Optional[Iterable[Field]] = None):
+        validate(self, fields)
+
+
+def _merge_block(cycle: dict[Field, Direction], block: dict[Field, Direction]):
+    """Merge a 2x2 block into ``cycle`` in place, exactly like ``Cycle.__add__``.
+
+    Only the twelve fields around ``block`` are looked at, so a merge costs O(1)
+    instead of rebuilding ``set(cycle)``. The iteration order of the intersection is
+    kept identical to ``neighbors & set(cycle)`` so the result does not change.
+    """
+    if len(cycle) == 0:
+        cycle.update(block)
+        return
+
+    neighbors = {field + d for field in set(block) for d in Direction}
+    if len(cycle) > len(neighbors):
+        intersect = {field for field in neighbors if field in cycle}
+    else:
+        intersect = neighbors & set(cycle)
+
+    if len(intersect) == 0:
+        raise NonAdjacentCyclesError
+
+    for field in intersect:
+        if field + cycle[field] in intersect:
+            break
+
+    for direction in Direction:
+        if field + direction in block:
+            break
 
-            size = FIELD_PX // 3
-            size = size if (size % 2 == 0) else size + 1
+    goal = field + cycle[field]
+    cycle[field] = direction
+    field += cycle[field]
 
-            left = min(x1, x2) - size // 2
-            top = min(y1, y2) - size // 2
-            width = abs(x1 - x2) + size
-            height = abs(y1 - y2) + size
+    while True:
+        cycle[field] = block[field]
+        field += cycle[field]
 
-            rect = pg.Rect(left, top, width, height)
-            surface.fill(Color.LIGHTYELLOW.value, rect)
+        if goal.dist(field) == 1:
+            break
+
+    for direction in Direction:
+        if field + direction == goal:
+            break
+    cycle[field] = direction
 
 
 class HamiltonianCycle(Cycle):
-    def __init__(self, cols: int, rows: int):
+    def __init__(self, cols: int, rows: int, fields: Optional[Fields] = None):
+        fields = Fields((cols, rows)) if fields is None else fields
         directions = [Direction.UP, Direction.RIGHT, Direction.DOWN, Direction.LEFT]
-        cycle = Cycle(
-            self._fields_from_start_with_directions(Field(0, 0), directions),
-            directions,
-        )
+        cycle: dict[Field, Direction] = {}
 
-        for col, row in product(range(cols), range(rows)):
-            if (col % 2 == 0) and (row % 2 == 0):
-                new_cycle = Cycle(
-                    self._fields_from_start_with_directions(
-                        Field(col, row), directions
-                    ),
-                    directions,
-                )
-                cycle = cycle + new_cycle
+        for col, row in product(range(0, cols, 2), range(0, rows, 2)):
+            start = fields[col, row]
+            block = self._fields_from_start_with_directions(start, directions)
+            _merge_block(cycle, dict(zip(block, directions)))
 
         super().__init__(list(cycle.keys()), list(cycle.values()))
 
@@ -190,6 +328,7 @@ class HamiltonianCycle(Cycle):
             fields.append(fields[-1] + direction)
         return list(fields)
 
+    @timed("split")
     def split(self, field: Field) -> tuple[Cycle, Cycle]:
         directions = _admissible_directions(field)
 
@@ -208,7 +347,7 @@ class HamiltonianCycle(Cycle):
             _directions.append(self[_field])
             _field += self[_field]
 
-        cycle1 = Cycle(_fields, _directions)
+        cycle1 = Cycle._unchecked(_fields, _directions)
 
         _fields = []
         _directions = []
@@ -222,22 +361,70 @@ class HamiltonianCycle(Cycle):
         _fields.append(_field)
         _directions.append((_admissible_directions(_field) - {self[_field]}).pop())
 
-        cycle2 = Cycle(_fields, _directions)
-
-        assert set(cycle1.keys()) & set(cycle2.keys()) == set()
+        cycle2 = Cycle._unchecked(_fields, _directions)
 
-        cycle1.is_valid_or_raise()
-        cycle2.is_valid_or_raise()
+        cycle1.validate([field])
+        cycle2.validate([_field])
         return cycle1, cycle2
 
 
+def join_points(
+    left: Union[Cycle, ArrayCycle],
+    right: Union[Cycle, ArrayCycle],
+    start: Field,
+    invalid_fields: Optional[Iterable[Field]] = None,
+    limit: Optional[int] = None,
+) -> list[Field]:
+    """The fields of ``left`` where ``right`` can be joined, in order after ``start``.
+
+    These are the fields of ``left`` with an admissible neighbour in ``right``, except
+    ``start`` and ``invalid_fields``. They are collected from the neighbours of
+    ``right`` into a set, so the walk along ``left`` costs one lookup per field and
+    stops after ``limit`` join points.
+    """
+    if isinstance(left, ArrayCycle) and isinstance(right, ArrayCycle):
+        points = array_join_points(left, right, start, invalid_fields, limit)
+        return [left.field(index) for index in points.tolist()]
+
+    invalid = {start} if invalid_fields is None else {start, *invalid_fields}
+    boundary = set()
+    for field in right:
+        for direction in Direction:
+            neighbor = field + direction
+            if (
+                neighbor in left
+                and neighbor not in invalid
+                and direction.opposite() in _admissible_directions(neighbor)
+            ):
+                boundary.add(neighbor)
+
+    limit = len(boundary) if limit is None else min(limit, len(boundary))
+    points: list[Field] = []
+    field = start
+    while len(points) < limit:
+        field += left[field]
+        if field in boundary:
+            points.append(field)
+    return points
+
+
+@timed("join_adjoint_cycles")
 def join_adjoint_cycles(
-    cycle1: Cycle,
-    cycle2: Cycle,
+    cycle1: Union[Cycle, ArrayCycle],
+    cycle2: Union[Cycle, ArrayCycle],
     start: Field,
     invalid_fields: Optional[list[Field]] = None,
+    skip: int = 0,
 ):
-    if set(cycle1) & set(cycle2) != set():
+    """Join both cycles at the first possible field after ``start``.
+
+    ``skip`` passes over that many possible fields, so callers can try other joints,
+    see ``join_points``.
+    """
+    if isinstance(cycle1, ArrayCycle) and isinstance(cycle2, ArrayCycle):
+        return join_adjoint_array_cycles(cycle1, cycle2, start, invalid_fields, skip)
+
+    if any(field in cycle1 for field in cycle2.keys()):
         raise ValueError("'cycle1' and 'cycle2' must be adjoint.")
 
     if start in cycle1:
@@ -249,27 +436,13 @@ def join_adjoint_cycles(
     else:
         raise ValueError(f"{start} is neither cycle1 not cycle2.")
 
-    invalid_fields = [] if invalid_fields is None else invalid_fields
-
-    field = start
-    fields = set(right)
-    while True:
-        field += left[field]
-
-        if field == start:
-            raise CycleError("unable to join cycles")
-
-        if field in invalid_fields:
-            continue
-
-        neighbors = {field + direction for direction in _admissible_directions(field)}
-
-        if neighbors & fields == set():
-            continue
-
-        break
+    points = join_points(left, right, start, invalid_fields, limit=skip + 1)
+    if len(points) <= skip:
+        raise CycleError("unable to join cycles")
 
+    field = points[skip]
     end = field + left[field]
+    joint = field
 
     left[field] = (_admissible_directions(field) - {left[field]}).pop()
     start_right = field + left[field]
@@ -289,15 +462,254 @@ def join_adjoint_cycles(
 
     left[field] = end.diff(field)
 
-    left.is_valid_or_raise()
+    left.validate([joint, field])
     return left
 
 
+class Splice:
+    """Successor changes of a cycle, which can be undone.
+
+    Every write goes through the splice, which remembers the old direction, so
+    ``rollback`` restores the cycle without copying it. ``skipped`` is the number of
+    fields a shortcut skips and ``joint`` the field they were re-inserted after.
+    ``renumber`` patches the cached positions of the cycle for the fields the splice
+    reordered, and ``rollback`` undoes that as well.
+    """
+
+    def __init__(self, cycle: Union[Cycle, ArrayCycle]):
+        self.cycle = cycle
+        self.changes: list[tuple[Field, Direction]] = []
+        self.skipped = 0
+        self.joint: Optional[Field] = None
+        self._version = cycle.version
+        self._journal = None
+
+    def __setitem__(self, field: Field, direction: Direction):
+        self.changes.append((field, self.cycle[field]))
+        self.cycle[field] = direction
+
+    def renumber(self, start: Field, end: Field):
+        relinked = [field for field, _ in self.changes]
+        self._journal = self.cycle.renumber(self._version, start, end, relinked)
+        self._version = self.cycle.version
+
+    def rollback(self):
+        for field, direction in reversed(self.changes):
+            self.cycle[field] = direction
+        self.changes.clear()
+
+        # the positions are those of the cycle before the splice again
+        self.cycle.restore(self._version, self._journal)
+        self._journal = None
+        self._version = self.cycle.version
+
+
+def shortcut(
+    cycle: Union[Cycle, ArrayCycle],
+    field: Field,
+    start: Field,
+    blocked: Callable[[Field, int], bool],
+    stop: Optional[Field] = None,
+    skip: int = 0,
+) -> Splice:
+    """Take the shortcut at ``field`` and re-insert the skipped fields after ``start``.
+
+    This is ``split`` followed by ``join_adjoint_cycles`` done in place: the skipped
+    fields are closed into a loop and joined back at the first possible field after
+    ``start``, which changes four successors. The skipped fields must lie between
+    ``field`` and ``start``. The joint is never a field for which ``blocked(field,
+    skipped)`` is true, its search ends at ``stop`` and passes over ``skip`` possible
+    joints. The joints are looked up among the admissible predecessors of the
+    skipped fields and ranked by their cached positions along the cycle, so the cost
+    is linear in the number of skipped fields, not in the size of the cycle. Only
+    patching the cached positions touches the fields between ``field`` and the
+    joint, which the compact cycle does in a few numpy copies.
+
+    On failure, the cycle is rolled back and a ``CycleError`` is raised, a
+    ``JoinError`` if only the skipped fields couldn't be joined back.
+    """
+    splice = Splice(cycle)
+    try:
+        _shortcut(splice, field, start, blocked, stop, skip)
+    except CycleError:
+        splice.rollback()
+        raise
+
+    cycle.validate([changed for changed, _ in splice.changes])
+    return splice
+
+
+def _shortcut(
+    splice: Splice,
+    field: Field,
+    start: Field,
+    blocked: Callable[[Field, int], bool],
+    stop: Optional[Field],
+    skip: int,
+):
+    cycle = splice.cycle
+    direction = (_admissible_directions(field) - {cycle[field]}).pop()
+    target = field + direction
+    if target not in cycle:
+        raise CycleError(f"{target} can't be entered.")
+
+    # the fields between 'field' and 'target' form the second cycle
+    joints: Iterable[tuple[Field, Field, Field]]
+    if isinstance(cycle, ArrayCycle):
+        first, last, skipped, joints = _array_joints(cycle, field, target, start, stop)
+    else:
+        first, last, skipped, joints = _joints(cycle, field, target, start, stop)
+
+    closing = (_admissible_directions(last) - {cycle[last]}).pop()
+    if last + closing != first:
+        raise CycleError(f"{last} cannot be connected to {first}.")
+
+    splice[field] = direction
+    splice[last] = closing
+
+    for _field, joint, before in joints:
+        if blocked(_field, skipped):
+            continue
+        if skip > 0:
+            skip -= 1
+            continue
+        break
+    else:
+        raise JoinError("unable to join cycles")
+
+    end = _field + cycle[_field]
+    if end.dist(before) != 1:
+        raise JoinError(f"{before} cannot be connected to {end}.")
+    splice[_field] = joint.diff(_field)
+    splice[before] = end.diff(before)
+    splice.skipped = skipped
+    splice.joint = _field
+    # the fields from 'field' to 'end' were reordered, all others kept their place
+    splice.renumber(field, end)
+
+
+def _joints(
+    cycle: Cycle, field: Field, target: Field, start: Field, stop: Optional[Field]
+) -> tuple[Field, Field, int, list[tuple[Field, Field, Field]]]:
+    # the first and last skipped field, the number of skipped fields and the
+    # possible joints in order after 'start' and before 'stop': the fields whose
+    # other admissible neighbour is skipped, that neighbour and the field before it
+    # once the skipped fields are closed into a loop
+    first = field + cycle[field]
+    skipped = {}
+    last = field
+    _field = first
+    while _field != target:
+        if _field == start:
+            raise CycleError("the shortcut is not shorter.")
+        skipped[_field] = last
+        last = _field
+        _field += cycle[_field]
+    skipped[first] = last
+
+    positions = cycle.positions()
+    size, origin = len(cycle), positions[start]
+    limit = size
+    if stop is not None and stop not in skipped:
+        limit = (positions[stop] - origin) % size or size
+
+    joints = []
+    for joint, before in skipped.items():
+        # the fields with an admissible direction towards 'joint'
+        for direction in _admissible_directions(joint):
+            _field = joint - direction
+            if _field in skipped or _field not in cycle:
+                continue
+            if cycle[_field] == direction and _field != field:
+                continue
+            rank = (positions[_field] - origin) % size
+            if 0 < rank < limit:
+                joints.append((rank, _field, joint, before))
+    joints.sort(key=lambda _joint: _joint[0])
+    return first, last, len(skipped), [_joint[1:] for _joint in joints]
+
+
+def _array_joints(
+    cycle: ArrayCycle,
+    field: Field,
+    target: Field,
+    start: Field,
+    stop: Optional[Field],
+) -> tuple[Field, Field, int, Iterator[tuple[Field, Field, Field]]]:
+    # like '_joints', the cells come from 'array_joints'
+    skipped, cells, joints, befores = array_joints(
+        cycle,
+        cycle.index(field),
+        cycle.index(target),
+        cycle.index(start),
+        None if stop is None else cycle.index(stop),
+    )
+    fields = cycle.field
+    candidates = zip(cells.tolist(), joints.tolist(), befores.tolist())
+    return (
+        fields(skipped[0]),
+        fields(skipped[-1]),
+        len(skipped),
+        ((fields(c), fields(j), fields(b)) for c, j, b in candidates),
+    )
+
+
+# number of joints 'CycleAI.optimize_anytime' tries per shortcut
+JOINTS = 3
+
+
 class CycleAI:
-    def __init__(self, board: Board):
+    """Follow a Hamiltonian cycle and cut it short towards the apple.
+
+    Without a ``budget``, ``optimize`` tries one shortcut at the head. With a budget
+    in seconds it takes shortcuts at the fields ahead of the head, trying other
+    joints for the cut off part, until the budget of the tick is spent. Every
+    shortcut is kept and the next one is taken on the shorter cycle, so none is
+    taken twice. A shortcut is only started if the slowest one of this and the last
+    tick still fits into the remaining budget. With ``exhaustive=True``, which needs
+    the ``compact`` cycle, ``optimize`` scores every shortcut between the head and
+    the apple at once and takes the longest one whose cut off part can be joined
+    back.
+
+    The cut off part may be re-inserted after a field of the snake if the tail
+    leaves that field before the head eats the apple. From then on the body follows
+    the cycle again, so it's safe to keep following it. To tell this in O(1),
+    ``_entered`` holds the move at which the head entered each field, which is
+    stamped incrementally as the snake moves, and ``_gap`` the stamp of the last
+    field of the body where the body doesn't follow the cycle.
+
+    ``pop_changed`` tells a renderer which fields it has to draw again.
+    """
+
+    def __init__(
+        self,
+        board: Board,
+        compact: bool = False,
+        budget: Optional[float] = None,
+        exhaustive: bool = False,
+    ):
+        if exhaustive and not compact:
+            raise ValueError("'exhaustive' needs the compact cycle.")
+
         self.board = board
+        self.budget = budget
+        self.exhaustive = exhaustive
         self.position = board.snake.head
-        self.cycle = HamiltonianCycle(*board.shape)
+        self.shortcuts = 0
+        self.cycle: Union[Cycle, ArrayCycle] = HamiltonianCycle(
+            *board.shape, fields=board.fields
+        )
+
+        if compact:
+            self.cycle = ArrayCycle.from_cycle(self.cycle, board.shape, board.fields)
+
+        self._entered = [0] * (board.shape[0] * board.shape[1])
+        self._moves = board.moves - len(board.snake)
+        self._sync()
+        self._gap = self._find_gap()
+        self._changed: Optional[set[Field]] = None
+        # the slowest shortcut 'optimize_anytime' tried in the last tick
+        self._slowest = 0.0
 
     def next(self) -> Direction:
         return self.cycle[self.head]
@@ -310,106 +722,272 @@ class CycleAI:
     def head(self):
         return self.snake.head
 
+    def copy(self, board: Board) -> "CycleAI":
+        """An independent copy of this AI which plays on ``board``."""
+        self._sync()
+        ai = copy.copy(self)
+        ai.board = board
+        ai.cycle = self.cycle.copy()
+        ai._entered = self._entered.copy()
+        # the changed fields belong to the renderer of this AI
+        ai._changed = None
+        return ai
+
+    def follow(self, cycle: Union[Cycle, ArrayCycle]):
+        """Follow ``cycle`` from now on, e.g. a cycle optimized by a copy."""
+        self.cycle = cycle
+        self._sync()
+        self._gap = self._find_gap()
+        self._changed = None
+
+    def pop_changed(self) -> Optional[set[Field]]:
+        """The fields at the ends of the edges that changed since the last call.
+
+        ``None`` if the whole cycle may have changed.
+        """
+        changed, self._changed = self._changed, set()
+        return changed
+
+    @timed("optimize")
     def optimize(self):
+        if self.exhaustive:
+            self.optimize_exhaustive()
+            return
+        if self.budget is not None:
+            self.optimize_anytime(self.budget)
+            return
+
         apple = self.board.apple
         field = self.head
 
-        print(f"field:    {field}")
-        print(f"distance: {self.cycle.dist(field, apple)}")
         directions = _admissible_directions(field) - {self.cycle[field]}
         directions = {d for d in directions if field + d in self.board}
 
         if directions == set():
-            print(f"    next: {field}: only one way to go")
+            count("only one way to go")
             return
 
         direction = directions.pop()
 
-        if self.board[field + direction] == Content.SNAKE:
-            print(f"    next: {field}: snake in the way, ")
+        if field + direction in self.snake:
+            count("snake in the way")
             return
 
-        if self.cycle.dist(field + direction, apple) >= self.cycle.dist(
-            field + self.cycle[field], apple
-        ):
-            print(f"    next: {field}: way got longer")
+        moves = int(self.cycle.dist(field + self.cycle[field], apple)) + 1
+        if self.cycle.dist(field + direction, apple) + 1 >= moves:
+            count("way got longer")
             return
 
-        succesful = self.split_and_join(field)
+        succesful = self.split_and_join(field, moves)
 
         if not succesful:
-            print(f"    next: {field}: couldn't split and join")
+            count("couldn't split and join")
             return
 
+        count("shortcut taken")
         return
 
-    def split_and_join(self, field: Field) -> bool:
-        apple = self.board.apple
-
-        cycle1, cycle2 = self.cycle.split(field)
-        assert field in cycle1
-        assert apple in cycle1
+    def optimize_anytime(self, budget: float):
+        # the budget is for the whole tick
+        if self._take_shortcuts(time.perf_counter() + budget) == 0:
+            count("no shortcut in budget")
+            return
+        count("shortcut taken")
 
-        invalid_fields = list(
-            self.board.snake
-        )  # TODO: not necessary to add whole snake
+    def optimize_exhaustive(self):
+        apple = self.board.apple
+        moves = int(self.cycle.dist(self.head, apple))
+        cells, _ = array_shortcuts(self.cycle, self.head, apple)  # type: ignore
 
-        _field = self.snake.head
-        while True:
-            _field += cycle1[_field]
-            if _field == apple:
-                break
-            invalid_fields.append(_field)
+        for cell in cells.tolist():
+            try:
+                self._take_shortcut(self.cycle.field(cell), moves)  # type: ignore
+            except CycleError:
+                continue
+            count("shortcut taken")
+            return
+        count("no shortcut")
+
+    def idle_path(self) -> list[Field]:
+        """The fields the head enters next, along the cycle, if ``optimize`` won't
+        change the cycle on the way.
+
+        The path ends before the apple, before the snake gets in the way and at the
+        first field with a shortcut towards the apple, where ``optimize`` might take
+        it. With a budget or ``exhaustive``, ``optimize`` looks for shortcuts up to
+        the apple, so the path is empty if there is any.
+        """
+        cycle = self.cycle
+        head, snake = self.head, self.snake
+        if cycle[head].opposite() == snake.direction:
+            return []
+
+        moves = int(cycle.dist(head, self.board.apple))
+        first = self._first_shortcut(moves)
+        if first < moves and (self.exhaustive or self.budget is not None):
+            return []
+
+        length = min(first, moves - 1)
+        if isinstance(cycle, ArrayCycle):
+            start = cycle.pos[cycle.index(head)]
+            cells = cycle.order[(start + 1 + np.arange(length)) % cycle.size]
+            path = [cycle.field(cell) for cell in cells.tolist()]
+        else:
+            path = []
+            field = head
+            for _ in range(length):
+                field += cycle[field]
+                path.append(field)
+
+        # the tail has to leave a field before the head enters it
+        self._sync()
+        tail = self.board.moves - len(snake) + 1
+        for move, field in enumerate(path):
+            if field in snake and self._entered[self._index(field)] >= tail + move:
+                return path[:move]
+        return path
+
+    def _first_shortcut(self, moves: int) -> int:
+        # the number of moves of the head to the first field with a shortcut
+        # towards the apple, 'moves' if there is none
+        cycle, head, apple = self.cycle, self.head, self.board.apple
+        if isinstance(cycle, ArrayCycle):
+            cells, _ = array_shortcuts(cycle, head, apple)
+            if len(cells) == 0:
+                return moves
+            ranks = (cycle.pos[cells] - cycle.pos[cycle.index(head)]) % cycle.size
+            return int(ranks.min())
+
+        positions = cycle.positions()
+        field = head
+        for rank in range(moves):
+            target = field + (_admissible_directions(field) - {cycle[field]}).pop()
+            if target in cycle:
+                ahead = (positions[target] - positions[head]) % len(cycle)
+                if rank + 1 < ahead <= moves:
+                    return rank
+            field += cycle[field]
+        return moves
+
+    def _take_shortcuts(self, deadline: float) -> int:
+        apple = self.board.apple
+        taken = 0
+        slowest = 0.0
+        last = time.perf_counter()
         try:
-            cycle = join_adjoint_cycles(cycle1, cycle2, apple, invalid_fields)
+            # a shortcut before the apple only skips empty fields, and every one
+            # is kept, as the next one is looked for on the shorter cycle
+            field = self.head
+            while field != apple:
+                for joint in range(JOINTS):
+                    # the time since the last check, the way along the cycle too
+                    now = time.perf_counter()
+                    slowest, last = max(slowest, now - last), now
+                    if now + max(slowest, self._slowest) >= deadline:
+                        return taken
+
+                    moves = int(self.cycle.dist(self.head, apple))
+                    try:
+                        self._take_shortcut(field, moves, joint)
+                    except JoinError:
+                        continue
+                    except CycleError:
+                        break
+                    taken += 1
+                    break
+                field += self.cycle[field]
+            return taken
+        finally:
+            # a slow shortcut holds back the next ticks, but fades out
+            self._slowest = max(slowest, self._slowest * 0.9)
+
+    def split_and_join(self, field: Field, moves: Optional[int] = None) -> bool:
+        """Take the shortcut at ``field``, if there is a safe one.
+
+        ``moves`` is the number of moves of the head to the apple, if it's known.
+        """
+        if moves is None:
+            moves = int(self.cycle.dist(self.head, self.board.apple))
+        try:
+            self._take_shortcut(field, moves)
         except CycleError:
             return False
+        return True
+
+    def _take_shortcut(self, field: Field, moves: int, joint: int = 0):
+        splice = self._shortcut(field, moves, joint)
+        self.shortcuts += 1
+        if self._changed is not None:
+            for _field, direction in splice.changes:
+                self._changed.update(
+                    (_field, _field + direction, _field + self.cycle[_field])
+                )
+        joined = splice.joint
+        if joined is not None and joined in self.snake:
+            self._gap = max(self._gap, self._entered[self._index(joined)])
+
+    def _shortcut(self, field: Field, moves: int, joint: int = 0) -> Splice:
+        target = field + (_admissible_directions(field) - {self.cycle[field]}).pop()
+        if target in self.snake:
+            raise CycleError(f"the snake is in the way at {target}.")
+
+        self._sync()
+        snake = self.snake
+        tail = self._entered[self._index(snake[-1])]
+
+        def blocked(_field: Field, skipped: int) -> bool:
+            # the head eats the apple after 'moves - skipped' moves, the tail must
+            # have left the joint and all earlier gaps one move before, as the head
+            # can't enter the field of the tail
+            limit = tail + moves - skipped - 1
+            if self._gap >= limit:
+                return True
+            return _field in snake and self._entered[self._index(_field)] >= limit
+
+        return shortcut(self.cycle, field, self.board.apple, blocked, self.head, joint)
+
+    def _index(self, field: Field) -> int:
+        return field.col * self.board.shape[1] + field.row
+
+    def _sync(self):
+        """Stamp the fields the head entered since the last call."""
+        moves = self.board.moves - self._moves
+        if moves == 0:
+            return
+
+        snake = self.snake
+        # the body is stamped from the tail to the head with consecutive moves
+        for index in reversed(range(min(moves, len(snake)))):
+            self._entered[self._index(snake[index])] = self.board.moves - index
+        self._moves = self.board.moves
 
-        if cycle.dist(field, apple) < self.cycle.dist(field, apple):
-            self.cycle = HamiltonianCycle.from_cycle(cycle)
-            return True
-        return False
+    def _find_gap(self) -> int:
+        # lower than the stamp of the tail if the body follows the cycle
+        gap = self.board.moves - len(self.snake)
+        snake = self.snake
+        for field, before in zip(islice(snake, 1, None), snake):
+            if field + self.cycle[field] != before:
+                gap = max(gap, self._entered[self._index(field)])
+        return gap
 
 
 class SnakeAIv3(BaseAI):
-    def search_best_direction(self) -> Direction:
-        field = self.head
-        visited: list[Field] = []
+    def __init__(self, board: Board):
+        super().__init__(board)
+        self._path_search = PathSearch(board.shape, admissible=True)
 
-        if len(self._directions) == self.apple.dist(field):
+    def search_best_direction(self) -> Direction:
+        if plan_is_safe(self.board, self._directions):
+            count("plan reused")
             return self._directions.popleft()
 
-        self._directions = deque([])
-
-        try:
-            self._search(field, self.apple, self.snake.direction, visited)
-        except StopSearch:
-            return self._directions.popleft()
-        else:
+        path = self._path_search.search(self.board, self.snake.direction)
+        if path is None:
+            self._directions = deque([])
             return self.stay_alive()
 
-    def _search(
-        self, start: Field, goal: Field, direction: Direction, visited: list[Field]
-    ) -> None:
-        if start == goal:
-            raise StopSearch
-
-        visited.append(start)
-
-        directions = self._get_admissible_directions(start) - {direction.opposite()}
-        directions &= self._get_alive_directions(start)
-        directions &= self._get_unvisited_directions(start, visited)
-
-        # directions = sorted(
-        #     directions,
-        #     key=lambda d: (d == direction)
-        #     and (self.apple.dist(self.head) < self.apple.dist(self.head + d)),
-        # )
-        # directions = sorted(directions, key=lambda d: self.apple.dist(start + d))
-        for _direction in self._sort_directions(start, direction, directions):
-            self._directions.append(_direction)
-            self._search(start + _direction, goal, _direction, visited=visited)
-            _ = self._directions.pop()
+        self._directions = deque(path)
+        return self._directions.popleft()
 
     def _get_admissible_directions(self, field: Field) -> set[Direction]:
         return {
@@ -418,38 +996,20 @@ class SnakeAIv3(BaseAI):
         }
 
     def _get_alive_directions(self, field: Field) -> set[Direction]:
+        board = self.board
         return {
             direction
             for direction in Direction
-            if (field + direction in self.board)
-            and (self.board[field + direction] != Content.SNAKE)
-        }
-
-    def _get_unvisited_directions(self, field: Field, visited: list[Field]):
-        return {
-            direction for direction in Direction if field + direction not in visited
+            if board.grid[board.cell(field + direction)] in ENTERABLE
         }
 
     def stay_alive(self):
-        print("Staying alive!")
+        count("staying alive")
         directions = self._get_admissible_directions(self.head)
         directions -= {self.snake.direction.opposite()}
         directions &= self._get_alive_directions(self.head)
-        return directions.pop()
-
-    def _sort_directions(
-        self, field: Field, cur_direction: Direction, directions: set[Direction]
-    ) -> list[Direction]:
-        def distance(direction: Direction) -> int:
-            return self.apple.dist(field + direction)
-
-        def sort_by_direction(direction: Direction) -> int:
-            if direction == cur_direction:
-                return 0
-            if distance(direction) < self.apple.dist(field):
-                return -1
-            if distance(direction) > self.apple.dist(field):
-                return 1
-            return 0
-
-        return sorted(sorted(directions, key=sort_by_direction), key=distance)
+        # keep going if possible, otherwise turn in a fixed order
+        for direction in (self.snake.direction, *Direction):
+            if direction in directions:
+                return direction
+        raise LoseError
@@ -0,0 +1,109 @@
+import random
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Union
+
+from .ai_cycle import Cycle, CycleAI
+from .cycle_array import ArrayCycle
+from .game import Field
+from .instrumentation import count
+
+
+@dataclass(frozen=True)
+class Proposal:
+    """A cycle for the tick at which the snake is expected to be ``snake``."""
+
+    tick: int
+    snake: tuple[Field, ...]
+    apple: Field
+    cycle: Union[Cycle, ArrayCycle]
+
+
+class BackgroundOptimizer:
+    """Run ``CycleAI.optimize`` on a worker thread instead of the game loop.
+
+    Every ``step`` the game loop hands a snapshot of the board to the worker, which
+    lets the snake follow the current cycle for ``lookahead`` moves and optimizes the
+    cycle there. When the game reaches that tick, the proposal is adopted if the
+    snake is exactly where it was expected and the apple did not change; otherwise
+    the snake keeps following its current cycle. The game loop never waits for the
+    worker.
+
+    ``CycleAI`` splices shortcuts into its cycle in place, so the worker plans on a
+    copy of the AI.
+    """
+
+    def __init__(self, ai: CycleAI, lookahead: int = 2):
+        self.ai = ai
+        self.lookahead = lookahead
+        self.tick = 0
+
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._future: Optional[Future[Optional[Proposal]]] = None
+        self._proposal: Optional[Proposal] = None
+
+    def step(self):
+        """Adopt a proposal for this tick, if any, and start planning the next one."""
+        if self._future is not None and self._future.done():
+            self._proposal = self._future.result()
+            self._future = None
+
+        proposal = self._proposal
+        if proposal is not None and proposal.tick <= self.tick:
+            self._proposal = None
+            if proposal.tick == self.tick and self._is_valid(proposal):
+                count("proposal adopted")
+                self.ai.follow(proposal.cycle)
+            else:
+                count("proposal rejected")
+
+        if self._future is None and self._proposal is None:
+            worker = self.ai.copy(self.ai.board.copy(rng=random.Random(0)))
+            self._future = self._executor.submit(
+                _plan, worker, self.tick + self.lookahead, self.lookahead
+            )
+
+        self.tick += 1
+
+    def wait(self):
+        """Wait for the worker, e.g. to get reproducible games."""
+        if self._future is not None:
+            self._future.result()
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "BackgroundOptimizer":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _is_valid(self, proposal: Proposal) -> bool:
+        board = self.ai.board
+        if board.apple != proposal.apple or tuple(board.snake) != proposal.snake:
+            return False
+
+        # the body must still follow the proposed cycle
+        cycle = proposal.cycle
+        snake = board.snake
+        return all(
+            snake[index + 1] + cycle[snake[index + 1]] == snake[index]
+            for index in range(len(snake) - 1)
+        )
+
+
+def _plan(ai: CycleAI, tick: int, lookahead: int) -> Optional[Proposal]:
+    board = ai.board
+    for _ in range(lookahead):
+        board.snake.turn(ai.next())
+        # the new apple is random, there is nothing to plan for
+        if board.snake.next_field() == board.apple:
+            return None
+        board.update()
+
+    shortcuts = ai.shortcuts
+    ai.optimize()
+    if ai.shortcuts == shortcuts:
+        return None
+    return Proposal(tick, tuple(board.snake), board.apple, ai.cycle)
@@ -0,0 +1,164 @@
+from typing import Optional
+
+import numpy as np
+
+from .cycle_array import ArrayCycle
+from .dtypes import Content, Direction
+
+EMPTY = Content.EMPTY.value
+SNAKE = Content.SNAKE.value
+APPLE = Content.APPLE.value
+
+# directions are encoded by their position in 'Direction', so 'code ^ 1' is the
+# opposite direction
+DIRECTIONS = list(Direction)
+_DCOL = np.array([direction.value[0] for direction in DIRECTIONS])
+_DROW = np.array([direction.value[1] for direction in DIRECTIONS])
+
+
+class BatchBoard:
+    """``batch`` games of snake on ``cols x rows`` boards, advanced in lockstep.
+
+    Cells are addressed by their flat index ``col * rows + row``, the same indexing
+    as ``ArrayCycle``. ``grid`` holds the ``Content`` value of every cell, ``body``
+    is a ring buffer of the snake cells per game with the head at
+    ``body[b, head[b]]`` and ``apple`` the cell of the apple. Finished games are
+    frozen.
+    """
+
+    def __init__(self, batch: int, shape: tuple[int, int], seed: Optional[int] = None):
+        self.batch = batch
+        self.shape = shape
+        self.size = shape[0] * shape[1]
+        self.rng = np.random.default_rng(seed)
+
+        self.cells = np.full((batch, self.size), EMPTY, dtype=np.uint8)
+        self.body = np.zeros((batch, self.size), dtype=np.int64)
+        self.head = np.ones(batch, dtype=np.int64)
+        self.length = np.full(batch, 2, dtype=np.int64)
+        self.direction = np.full(batch, DIRECTIONS.index(Direction.LEFT))
+        self.apple = np.full(batch, -1, dtype=np.int64)
+
+        self.steps = np.zeros(batch, dtype=np.int64)
+        self.won = np.zeros(batch, dtype=bool)
+        self.lost = np.zeros(batch, dtype=bool)
+
+        head = (shape[0] // 2) * shape[1] + shape[1] // 2
+        self.body[:, 0] = head + shape[1]
+        self.body[:, 1] = head
+        self.cells[:, head] = SNAKE
+        self.cells[:, head + shape[1]] = SNAKE
+
+        self._spawn_apples(np.arange(batch))
+
+    @property
+    def grid(self) -> np.ndarray:
+        return self.cells.reshape(self.batch, *self.shape)
+
+    @property
+    def heads(self) -> np.ndarray:
+        return self.body[np.arange(self.batch), self.head]
+
+    @property
+    def tails(self) -> np.ndarray:
+        return self.body[
+            np.arange(self.batch), (self.head - self.length + 1) % self.size
+        ]
+
+    @property
+    def done(self) -> np.ndarray:
+        return self.won | self.lost
+
+    @property
+    def apples(self) -> np.ndarray:
+        return self.length - 2
+
+    def step(self, directions: np.ndarray):
+        """Move every running game one step into ``directions``.
+
+        ``directions`` are indices into ``DIRECTIONS``. Like ``Snake.turn``, turning
+        around is ignored and the snake keeps its direction.
+        """
+        directions = np.asarray(directions)
+        turn = directions != (self.direction ^ 1)
+        self.direction = np.where(turn, directions, self.direction)
+
+        games = np.flatnonzero(~self.done)
+        if len(games) == 0:
+            return
+
+        heads = self.body[games, self.head[games]]
+        col, row = np.divmod(heads, self.shape[1])
+        col = col + _DCOL[self.direction[games]]
+        row = row + _DROW[self.direction[games]]
+        self.steps[games] += 1
+
+        outside = (
+            (col < 0) | (col >= self.shape[0]) | (row < 0) | (row >= self.shape[1])
+        )
+        target = np.where(outside, 0, col * self.shape[1] + row)
+        eats = ~outside & (target == self.apple[games])
+        crashes = outside | (~eats & (self.cells[games, target] == SNAKE))
+        self.lost[games[crashes]] = True
+
+        moves = ~eats & ~crashes
+        moving = games[moves]
+        tails = (self.head[moving] - self.length[moving] + 1) % self.size
+        self.cells[moving, self.body[moving, tails]] = EMPTY
+
+        alive = games[~crashes]
+        target = target[~crashes]
+        self.head[alive] = (self.head[alive] + 1) % self.size
+        self.body[alive, self.head[alive]] = target
+        self.cells[alive, target] = SNAKE
+
+        eaters = games[eats]
+        self.length[eaters] += 1
+        self._spawn_apples(eaters)
+
+    def step_cells(self, cells: np.ndarray):
+        """Move every running game one step onto the neighbouring ``cells``."""
+        delta = np.asarray(cells) - self.heads
+        directions = np.select(
+            [delta == self.shape[1], delta == -self.shape[1], delta == 1, delta == -1],
+            [
+                DIRECTIONS.index(Direction.RIGHT),
+                DIRECTIONS.index(Direction.LEFT),
+                DIRECTIONS.index(Direction.UP),
+                DIRECTIONS.index(Direction.DOWN),
+            ],
+            default=-1,
+        )
+        if np.any((directions < 0) & ~self.done):
+            raise ValueError("all cells must be neighbours of the heads.")
+        self.step(np.where(directions < 0, self.direction, directions))
+
+    def step_cycle(self, cycle: ArrayCycle):
+        """Follow the successor table of ``cycle``, e.g. a ``HamiltonianCycle``."""
+        if cycle.shape != self.shape:
+            raise ValueError("'cycle' and the board must have the same shape.")
+        self.step_cells(cycle.succ[self.heads])
+
+    def run_cycle(self, cycle: ArrayCycle, max_steps: Optional[int] = None):
+        max_steps = self.size**2 if max_steps is None else max_steps
+        for _ in range(max_steps):
+            if np.all(self.done):
+                break
+            self.step_cycle(cycle)
+
+    def _spawn_apples(self, games: np.ndarray):
+        if len(games) == 0:
+            return
+
+        # the largest random key among the empty cells is a uniform random empty cell
+        keys = self.rng.random((len(games), self.size))
+        keys[self.cells[games] != EMPTY] = -1.0
+        apples = np.argmax(keys, axis=1)
+
+        full = keys[np.arange(len(games)), apples] < 0
+        self.won[games[full]] = True
+        self.apple[games[full]] = -1
+
+        games = games[~full]
+        self.apple[games] = apples[~full]
+        self.cells[games, apples[~full]] = APPLE
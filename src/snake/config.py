@@ -1,3 +1,7 @@
+import os
+
+from .dtypes import Validation
+
 __all__ = [
     "BOARD_SIZE",
     "FIELD_PX",
@@ -5,6 +9,9 @@ __all__ = [
     "BORDER_PX",
     "WINSIZE",
     "FRAMES_PER_MOVE",
+    "CYCLE_VALIDATION",
+    "CYCLE_VALIDATION_SAMPLE_RATE",
+    "INSTRUMENTATION",
 ]
 
 BOARD_SIZE: tuple[int, int] = (16, 10)
@@ -16,3 +23,12 @@ WINSIZE: tuple[int, int] = tuple(
 )  # type: ignore
 
 FRAMES_PER_MOVE: int = 2
+
+CYCLE_VALIDATION: Validation = Validation(
+    os.environ.get("SNAKE_CYCLE_VALIDATION", Validation.OFF.value)
+)
+CYCLE_VALIDATION_SAMPLE_RATE: int = int(
+    os.environ.get("SNAKE_CYCLE_VALIDATION_SAMPLE_RATE", "100")
+)
+
+INSTRUMENTATION: bool = os.environ.get("SNAKE_INSTRUMENTATION", "0") == "1"
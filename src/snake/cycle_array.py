@@ -0,0 +1,528 @@
+from functools import lru_cache
+from typing import Iterable, Iterator, Mapping, Optional, Union
+
+import numpy as np
+
+from .dtypes import Direction
+from .exceptions import CycleError, InvalidCycleError
+from .game import Field, Fields
+from .instrumentation import timed
+from .validation import validate
+
+
+@lru_cache(maxsize=None)
+def _admissible_neighbors(shape: tuple[int, int]) -> tuple[np.ndarray, np.ndarray]:
+    """Flat indices of the vertical and horizontal admissible neighbour of each cell.
+
+    Both arrays have one extra trailing entry so that ``-1`` (off the board) can be
+    used as an index into any array built with the same padding.
+    """
+    cols, rows = shape
+    col, row = np.divmod(np.arange(cols * rows), rows)
+
+    vertical_row = np.where(col % 2 == 0, row + 1, row - 1)
+    vertical = np.where(
+        (vertical_row >= 0) & (vertical_row < rows), col * rows + vertical_row, -1
+    )
+    horizontal_col = np.where(row % 2 == 0, col - 1, col + 1)
+    horizontal = np.where(
+        (horizontal_col >= 0) & (horizontal_col < cols),
+        horizontal_col * rows + row,
+        -1,
+    )
+    return np.append(vertical, -1), np.append(horizontal, -1)
+
+
+@lru_cache(maxsize=None)
+def _admissible_predecessors(shape: tuple[int, int]) -> tuple[np.ndarray, np.ndarray]:
+    """The inverse of ``_admissible_neighbors``.
+
+    For each cell the flat index of the cell whose vertical, respectively horizontal,
+    admissible neighbour it is, or ``-1``. Padded like ``_admissible_neighbors``.
+    """
+    size = shape[0] * shape[1]
+    inverse = []
+    for neighbors in _admissible_neighbors(shape):
+        predecessors = np.full(size + 1, -1, dtype=np.int64)
+        on_board = np.flatnonzero(neighbors[:-1] >= 0)
+        predecessors[neighbors[on_board]] = on_board
+        inverse.append(predecessors)
+    return inverse[0], inverse[1]
+
+
+class ArrayCycle:
+    """A cycle on a ``cols x rows`` board stored as a successor table.
+
+    Cells are addressed by their flat index ``col * rows + row``. ``succ[i]`` is the
+    index of the cell following ``i`` on the cycle or ``-1`` if ``i`` is not part of
+    it. ``order`` lists the cells along the cycle and ``pos`` is its inverse, so the
+    distance between two cells is ``(pos[b] - pos[a]) % len(cycle)``. Both are
+    walked once per ``version``, which every write bumps, and patched by
+    ``renumber`` after a splice which only reordered a stretch of the cycle.
+
+    The class mirrors the mapping interface of ``Cycle`` so that code written for
+    ``dict[Field, Direction]`` cycles runs on it unchanged.
+    """
+
+    def __init__(
+        self,
+        shape: tuple[int, int],
+        succ: np.ndarray,
+        order: Optional[np.ndarray] = None,
+        fields: Optional[Fields] = None,
+    ):
+        if shape[1] < 2:
+            raise ValueError("'ArrayCycle' needs at least two rows.")
+
+        self.shape = shape
+        self.fields = Fields(shape) if fields is None else fields
+        self.succ = np.asarray(succ, dtype=np.int64)
+        self.size = int(np.count_nonzero(self.succ >= 0))
+        self.version = 0
+        self._order = order
+        self._order_version = 0 if order is not None else -1
+        self._pos: Optional[np.ndarray] = None
+        self._directions = {
+            shape[1]: Direction.RIGHT,
+            -shape[1]: Direction.LEFT,
+            1: Direction.UP,
+            -1: Direction.DOWN,
+        }
+
+        if order is None:
+            self.validate()
+
+    @classmethod
+    def from_cycle(
+        cls,
+        cycle: Mapping[Field, Direction],
+        shape: tuple[int, int],
+        fields: Optional[Fields] = None,
+    ) -> "ArrayCycle":
+        succ = np.full(shape[0] * shape[1], -1, dtype=np.int64)
+        for field, direction in cycle.items():
+            target = field + direction
+            if not (_on_board(field, shape) and _on_board(target, shape)):
+                raise InvalidCycleError(f"{field} -> {target} leaves the board.")
+            succ[field.col * shape[1] + field.row] = target.col * shape[1] + target.row
+        return cls(shape, succ, fields=fields)
+
+    def index(self, field: Field) -> int:
+        if not _on_board(field, self.shape):
+            return -1
+        return field.col * self.shape[1] + field.row
+
+    def field(self, index: int) -> Field:
+        return self.fields.flat[index]
+
+    @property
+    def order(self) -> np.ndarray:
+        if self._order is None or self._order_version != self.version:
+            self._set_order(self._walk())
+        return self._order  # type: ignore
+
+    @property
+    def pos(self) -> np.ndarray:
+        order = self.order
+        if self._pos is None:
+            pos = np.full(len(self.succ), -1, dtype=np.int64)
+            pos[order] = np.arange(len(order))
+            self._pos = pos
+        return self._pos
+
+    def renumber(
+        self,
+        version: int,
+        start: Field,
+        end: Field,
+        relinked: Iterable[Field] = (),
+    ) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        """Patch ``order`` and ``pos`` after a splice which reordered the cells between
+        ``start`` and ``end``, and nothing else, since ``version``.
+
+        ``relinked`` are the cells whose successor the splice changed. The cells in
+        between kept their old order in runs which end at those, so the runs are
+        copied as a whole. Returns the cells and their old positions for
+        ``restore``, or ``None`` if the order was not cached at ``version``.
+        """
+        if self._order is None or self._order_version != version:
+            return None
+
+        self._order_version = self.version
+        pos, succ, size = self.pos, self.succ, self.size
+        first, stop = self.index(start), self.index(end)
+        offset = int(pos[first]) + 1
+        length = int((pos[stop] - offset) % size)
+        positions = np.arange(offset, offset + length)
+        window: Union[slice, np.ndarray] = slice(offset, offset + length)
+        if offset + length > size:
+            positions %= size
+            window = positions
+        before = self._order[window].copy()
+
+        ranks = ((int(pos[self.index(field)]) - offset) % size for field in relinked)
+        breaks = sorted(rank for rank in ranks if rank < length)
+        runs = []
+        cell = int(succ[first])
+        while cell != stop:
+            run = int((pos[cell] - offset) % size)
+            last = next((rank for rank in breaks if rank >= run), length - 1)
+            runs.append(before[run : last + 1])
+            cell = int(succ[before[last]])
+
+        span = np.concatenate(runs) if runs else before
+        pos[span] = positions
+        self._order[window] = span
+        return before, positions
+
+    def restore(self, version: int, journal: Optional[tuple[np.ndarray, np.ndarray]]):
+        """Undo ``renumber`` after the splice was rolled back.
+
+        ``version`` is the version the ``journal`` belongs to.
+        """
+        if self._order is None or self._order_version != version:
+            return
+
+        self._order_version = self.version
+        if journal is not None:
+            span, old = journal
+            self.pos[span] = old
+            self._order[old] = span
+
+    def _walk(self) -> np.ndarray:
+        succ = self.succ.tolist()
+        start = int(np.argmax(self.succ >= 0))
+        order = [start]
+        cur = succ[start]
+        while cur != start and len(order) <= self.size:
+            order.append(cur)
+            cur = succ[cur]
+        return np.array(order, dtype=np.int64)
+
+    def _set_order(self, order: np.ndarray):
+        self._order = order
+        self._order_version = self.version
+        self._pos = None
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, field: object) -> bool:
+        if not isinstance(field, Field):
+            return False
+        index = self.index(field)
+        return index >= 0 and self.succ[index] >= 0
+
+    def __iter__(self) -> Iterator[Field]:
+        return (self.field(index) for index in self.order.tolist())
+
+    def __getitem__(self, field: Field) -> Direction:
+        index = self.index(field)
+        if index < 0 or self.succ[index] < 0:
+            raise KeyError(field)
+        return self._directions[int(self.succ[index]) - index]
+
+    def __setitem__(self, field: Field, direction: Direction):
+        index = self.index(field)
+        target = self.index(field + direction)
+        if index < 0 or target < 0:
+            raise InvalidCycleError(f"{field} -> {field + direction} leaves the board.")
+        if self.succ[index] < 0:
+            self.size += 1
+        self.succ[index] = target
+        self.version += 1
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, ArrayCycle):
+            return self.shape == other.shape and np.array_equal(self.succ, other.succ)
+        if isinstance(other, Mapping):
+            return dict(self.items()) == dict(other)
+        return NotImplemented
+
+    def keys(self) -> Iterator[Field]:
+        return iter(self)
+
+    def values(self) -> Iterator[Direction]:
+        return (direction for _, direction in self.items())
+
+    def items(self) -> Iterator[tuple[Field, Direction]]:
+        for index in self.order.tolist():
+            yield self.field(index), self._directions[int(self.succ[index]) - index]
+
+    def copy(self) -> "ArrayCycle":
+        return ArrayCycle(
+            self.shape, self.succ.copy(), order=self.order.copy(), fields=self.fields
+        )
+
+    @timed("dist")
+    def dist(self, start: Field, end: Field) -> float:
+        self.validate()
+
+        if start == end:
+            return 0
+        index = self.index(start)
+        if index < 0 or self.succ[index] < 0:
+            raise KeyError(start)
+        if end not in self:
+            return np.nan
+        pos = self.pos
+        return int((pos[self.index(end)] - pos[index]) % self.size)
+
+    @timed("is_valid_or_raise")
+    def is_valid_or_raise(self):
+        on_cycle = self.succ >= 0
+        indices = np.flatnonzero(on_cycle)
+        targets = self.succ[indices]
+
+        if len(indices) == 0:
+            raise InvalidCycleError("the cycle is empty.")
+        if np.any(targets >= len(self.succ)):
+            raise InvalidCycleError("some fields point outside of the board.")
+        if not np.all(on_cycle[targets]):
+            index = indices[np.argmin(on_cycle[targets])]
+            raise InvalidCycleError(
+                f"{self.field(index)} points to {self.field(self.succ[index])} "
+                "which does not exist."
+            )
+        if len(np.unique(targets)) != len(targets):
+            raise InvalidCycleError("several fields point to the same field.")
+
+        dcol, drow = np.divmod(targets, self.shape[1])
+        col, row = np.divmod(indices, self.shape[1])
+        if np.any(np.abs(dcol - col) + np.abs(drow - row) != 1):
+            raise InvalidCycleError("some fields point to non-adjacent fields.")
+
+        order = self._walk()
+        if len(order) != self.size:
+            raise InvalidCycleError(
+                "it is not possible to reach all fields starting from "
+                f"{self.field(order[0])}."
+            )
+        if self._order_version != self.version:
+            self._set_order(order)
+
+    def check_splice(self, fields: Iterable[Field]):
+        targets = set()
+        for field in fields:
+            if field not in self:
+                raise InvalidCycleError(f"{field} is not part of the cycle.")
+            target = int(self.succ[self.index(field)])
+            if self.succ[target] < 0:
+                raise InvalidCycleError(
+                    f"{field} points to {self.field(target)} which does not exist."
+                )
+            if target in targets:
+                raise InvalidCycleError(f"several fields point to {self.field(target)}")
+            targets.add(target)
+
+    def validate(self, fields: Optional[Iterable[Field]] = None):
+        validate(self, fields)
+
+    @timed("split")
+    def split(self, field: Field) -> tuple["ArrayCycle", "ArrayCycle"]:
+        index = self.index(field)
+        if index < 0 or self.succ[index] < 0:
+            raise KeyError(field)
+
+        vertical, horizontal = _admissible_neighbors(self.shape)
+        candidates = {int(vertical[index]), int(horizontal[index])} - {
+            int(self.succ[index])
+        }
+        target = candidates.pop()
+        if target < 0 or self.succ[target] < 0:
+            raise CycleError(f"cannot split cycles at {field}")
+
+        pos = self.pos
+        rolled = np.roll(self.order, -(int(pos[index]) + 1))
+        length = int((pos[target] - pos[index] - 1) % self.size)
+
+        inner = rolled[:length]
+        outer = rolled[length:]
+
+        last = int(inner[-1])
+        closing = ({int(vertical[last]), int(horizontal[last])} - {target}).pop()
+        if closing != inner[0]:
+            raise InvalidCycleError(
+                f"{self.field(last)} cannot be connected to {self.field(inner[0])}."
+            )
+
+        n = len(self.succ)
+        cycle1 = ArrayCycle(self.shape, _succ_from_order(outer, n), outer, self.fields)
+        cycle2 = ArrayCycle(self.shape, _succ_from_order(inner, n), inner, self.fields)
+
+        cycle1.validate([field])
+        cycle2.validate([self.field(last)])
+        return cycle1, cycle2
+
+
+def _on_board(field: Field, shape: tuple[int, int]) -> bool:
+    return (0 <= field.col < shape[0]) and (0 <= field.row < shape[1])
+
+
+def _succ_from_order(order: np.ndarray, n: int) -> np.ndarray:
+    succ = np.full(n, -1, dtype=np.int64)
+    succ[order] = np.roll(order, -1)
+    return succ
+
+
+def array_join_points(
+    left: ArrayCycle,
+    right: ArrayCycle,
+    start: Field,
+    invalid_fields: Optional[Iterable[Field]] = None,
+    limit: Optional[int] = None,
+) -> np.ndarray:
+    """The cells of ``left`` where ``right`` can be joined, in order after ``start``.
+
+    These are the cells of ``left`` with an admissible neighbour in ``right``. They
+    are looked up from the cells of ``right`` and ranked by their position on
+    ``left``, so the cost depends on the size of ``right`` but not of ``left``.
+    """
+    vertical, horizontal = _admissible_predecessors(left.shape)
+    cells = right.order
+    boundary = np.concatenate([vertical[cells], horizontal[cells]])
+
+    # padded like '_admissible_predecessors', so '-1' is never valid
+    valid = np.append(left.succ >= 0, False)
+    valid[left.index(start)] = False
+    if invalid_fields is not None:
+        valid[[left.index(field) for field in invalid_fields]] = False
+    boundary = np.unique(boundary[valid[boundary]])
+
+    ranks = (left.pos[boundary] - left.pos[left.index(start)] - 1) % left.size
+    if limit is not None and limit < len(boundary):
+        nearest = np.argpartition(ranks, limit)[:limit]
+        return boundary[nearest[np.argsort(ranks[nearest])]]
+    return boundary[np.argsort(ranks)]
+
+
+def array_shortcuts(
+    cycle: ArrayCycle, start: Field, end: Field
+) -> tuple[np.ndarray, np.ndarray]:
+    """Every shortcut on the way from ``start`` to ``end``, the longest first.
+
+    A shortcut leaves a cell through its other admissible neighbour, which has to
+    lie further ahead on the way, at the latest at ``end``, and skips the cells in
+    between. Returns the cells of the shortcuts and the number of cells they skip.
+    All cells of the way are scored at once from ``pos``, ties are broken by the
+    distance from ``start``. Whether the skipped cells can be joined back is left
+    to the caller.
+    """
+    pos, size = cycle.pos, cycle.size
+    first = int(pos[cycle.index(start)])
+    length = int((pos[cycle.index(end)] - first) % size)
+    cells = cycle.order[(first + np.arange(length)) % size]
+
+    vertical, horizontal = _admissible_neighbors(cycle.shape)
+    succ = cycle.succ[cells]
+    admissible = (vertical[cells] == succ) | (horizontal[cells] == succ)
+    other = np.where(vertical[cells] == succ, horizontal[cells], vertical[cells])
+
+    # padded like '_admissible_neighbors', so '-1' is never on the cycle
+    on_cycle = np.append(cycle.succ >= 0, False)
+    ahead = (pos[other] - first) % size
+    skipped = ahead - np.arange(length) - 1
+    valid = admissible & on_cycle[other] & (skipped > 0) & (ahead <= length)
+
+    cells, skipped = cells[valid], skipped[valid]
+    longest = np.argsort(-skipped, kind="stable")
+    return cells[longest], skipped[longest]
+
+
+def array_joints(
+    cycle: ArrayCycle, cell: int, target: int, start: int, stop: Optional[int] = None
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """The joints for the cells which a shortcut from ``cell`` to ``target`` skips.
+
+    Returns the skipped cells along the cycle and the cells after ``start`` and
+    before ``stop`` whose other admissible neighbour is skipped, in order along the
+    cycle, with that neighbour and the cell before it once the skipped cells are
+    closed into a loop. Only the admissible predecessors of the skipped cells are
+    looked at, ranked by ``pos``. Raises a ``CycleError`` if ``start`` is skipped.
+    """
+    pos, order, size = cycle.pos, cycle.order, cycle.size
+    length = int((pos[target] - pos[cell] - 1) % size)
+    skipped = order[(pos[cell] + 1 + np.arange(length)) % size]
+    if 0 < (pos[start] - pos[cell]) % size <= length:
+        raise CycleError("the shortcut is not shorter.")
+
+    vertical, horizontal = _admissible_predecessors(cycle.shape)
+    cells = np.concatenate([vertical[skipped], horizontal[skipped]])
+    joints = np.concatenate([skipped, skipped])
+
+    on_board = cells >= 0
+    cells, joints = cells[on_board], joints[on_board]
+    succ = cycle.succ[cells]
+    # 'cell' is about to leave through its other admissible neighbour
+    valid = (succ >= 0) & ((succ != joints) | (cells == cell))
+    cells, joints = cells[valid], joints[valid]
+
+    ranks = (pos[cells] - pos[start]) % size
+    limit = size
+    if stop is not None and not 0 < (pos[stop] - pos[cell]) % size <= length:
+        limit = int((pos[stop] - pos[start]) % size) or size
+    ahead = (pos[cells] - pos[cell]) % size
+    valid = ((ahead == 0) | (ahead > length)) & (ranks > 0) & (ranks < limit)
+
+    cells, joints, ranks = cells[valid], joints[valid], ranks[valid]
+    ahead = np.argsort(ranks, kind="stable")
+    cells, joints = cells[ahead], joints[ahead]
+    befores = np.where(joints == skipped[0], skipped[-1], order[pos[joints] - 1])
+    return skipped, cells, joints, befores
+
+
+def join_adjoint_array_cycles(
+    cycle1: ArrayCycle,
+    cycle2: ArrayCycle,
+    start: Field,
+    invalid_fields: Optional[Iterable[Field]] = None,
+    skip: int = 0,
+) -> ArrayCycle:
+    if np.any((cycle1.succ >= 0) & (cycle2.succ >= 0)):
+        raise ValueError("'cycle1' and 'cycle2' must be adjoint.")
+
+    if start in cycle1:
+        left = cycle1
+        right = cycle2
+    elif start in cycle2:
+        left = cycle2
+        right = cycle1
+    else:
+        raise ValueError(f"{start} is neither cycle1 not cycle2.")
+
+    n = len(left.succ)
+    vertical, horizontal = _admissible_neighbors(left.shape)
+    in_right = np.append(right.succ >= 0, False)
+
+    points = array_join_points(left, right, start, invalid_fields, limit=skip + 1)
+    if len(points) <= skip:
+        raise CycleError("unable to join cycles")
+
+    field = int(points[skip])
+    end = int(left.succ[field])
+    start_right = int(
+        vertical[field] if in_right[vertical[field]] else horizontal[field]
+    )
+
+    tail = np.roll(left.order, -int(left.pos[end]))
+    inserted = np.roll(right.order, -int(right.pos[start_right]))
+
+    last = int(inserted[-1])
+    if (
+        abs(last // left.shape[1] - end // left.shape[1])
+        + abs(last % left.shape[1] - end % left.shape[1])
+        != 1
+    ):
+        raise ValueError(
+            f"the distance between both fields must be 1, {left.field(end)} and "
+            f"{left.field(last)} are not adjacent."
+        )
+
+    order = np.concatenate([tail, inserted])
+    left.succ = _succ_from_order(order, n)
+    left.size = len(order)
+    left.version += 1
+    left._set_order(order)
+
+    left.validate([left.field(field), left.field(last)])
+    return left
@@ -4,6 +4,7 @@ __all__ = [
     "Color",
     "Content",
     "Direction",
+    "Validation",
 ]
 
 
@@ -31,8 +32,19 @@ class Direction(enum.Enum):
     UP = (0, 1)
     DOWN = (0, -1)
 
+    def __init__(self, dcol: int, drow: int):
+        # a small integer key for tables, LEFT, RIGHT, DOWN, UP are 0 to 3, so the
+        # opposite direction is 'index ^ 1'
+        self.index = 2 * abs(drow) + (dcol + drow + 1) // 2
+
     def opposite(self):
         return Direction((-self.value[0], -self.value[1]))
 
     def __repr__(self):
         return f"<{self.__class__.__name__}.{self.name}>"
+
+
+class Validation(enum.Enum):
+    OFF = "off"
+    SAMPLED = "sampled"
+    ALWAYS = "always"
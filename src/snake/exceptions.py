@@ -20,3 +20,7 @@ class InvalidCycleError(Exception):
 
 class CycleError(Exception):
     pass
+
+
+class JoinError(CycleError):
+    pass
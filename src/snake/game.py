@@ -1,37 +1,54 @@
 import random
-from collections import deque
-from typing import Optional
+from collections.abc import Mapping
+from itertools import chain
+from typing import Iterable, Iterator, Optional, Sequence
 
-import pygame as pg
+import numpy as np
 
-from .config import BORDER_PX, FIELD_PX, GAP_PX, WINSIZE
 from .dtypes import Content, Direction
 from .exceptions import LoseError, WinError
+from .instrumentation import timed
 
 
 class Field:
+    __slots__ = ("col", "row", "index", "cell", "_hash", "_neighbors")
+
     def __init__(self, col: int, row: int):
         self.col = col
         self.row = row
-        self._rect = None
+        self.index = -1
+        self.cell = -1
+        self._hash = hash((col, row))
+        self._neighbors: tuple[Optional[Field], ...] = _NO_NEIGHBORS
 
     def __eq__(self, other):
-        return (self.col == other.col) and (self.row == other.row)
+        return (self is other) or ((self.col == other.col) and (self.row == other.row))
 
     def __sub__(self, other: Direction):
         if not isinstance(other, Direction):
             raise ValueError("You can only subtract 'Direction' from 'Field'!")
 
+        neighbor = self._neighbors[other.index ^ 1]
+        if neighbor is not None:
+            return neighbor
+
         return Field(self.col - other.value[0], self.row - other.value[1])
 
     def __add__(self, other: Direction):
         if not isinstance(other, Direction):
             raise ValueError("You can only add 'Direction' to 'Field'!")
 
+        neighbor = self._neighbors[other.index]
+        if neighbor is not None:
+            return neighbor
+
         return Field(self.col + other.value[0], self.row + other.value[1])
 
     def __hash__(self):
-        return hash((self.col, self.row))
+        return self._hash
+
+    def __reduce__(self):
+        return Field, (self.col, self.row)
 
     def __str__(self):
         return f"Field(col={self.col}, row={self.row})"
@@ -50,26 +67,172 @@ class Field:
 
         return Direction((self.col - other.col, self.row - other.row))
 
-    @property
-    def rect(self) -> pg.Rect:
-        if self._rect is None:
-            left = BORDER_PX + self.col * FIELD_PX + self.col * GAP_PX
-            top = (
-                WINSIZE[1] - BORDER_PX - ((self.row + 1) * FIELD_PX + self.row * GAP_PX)
-            )
-            width = FIELD_PX
-            height = FIELD_PX
-            self._rect = pg.Rect(left, top, width, height)
-        return self._rect
 
+# indexed by 'Direction.index'
+_NO_NEIGHBORS: tuple[Optional[Field], ...] = (None,) * len(Direction)
+
+# the content of a cell of 'Board.grid' is the value of its 'Content', the border
+# is 0
+BORDER = 0
+# the cells the snake can move onto
+ENTERABLE = (Content.EMPTY.value, Content.APPLE.value)
+_CONTENTS = {content.value: content for content in Content}
+
+
+class Fields:
+    """Interned fields of a ``cols x rows`` board.
 
-class Snake(deque[Field]):
-    def __init__(self, pos: Field, direction: Direction = Direction.LEFT):
-        super().__init__([pos, pos - direction])
+    Every coordinate of the board and of a one field wide border around it maps to a
+    single shared ``Field``. These fields know their neighbors, so ``field +
+    direction`` is a lookup instead of an allocation. Coordinates outside of the
+    table still work, they just get a fresh, non-interned ``Field``. ``flat`` lists
+    the fields of the board by their flat index ``col * rows + row``, which is also
+    their ``index``. The ``index`` of all other fields is -1. ``cell`` is the index
+    into the board padded by the border, ``(col + 1) * (rows + 2) + row + 1``, it is
+    -1 for fields outside of the table.
+    """
+
+    def __init__(self, shape: tuple[int, int]):
+        self.shape = shape
+
+        self._fields = {
+            (col, row): Field(col, row)
+            for col in range(-1, shape[0] + 1)
+            for row in range(-1, shape[1] + 1)
+        }
+        for field in self._fields.values():
+            field.cell = (field.col + 1) * (shape[1] + 2) + field.row + 1
+            neighbors: list[Optional[Field]] = [None] * len(Direction)
+            for direction in Direction:
+                dcol, drow = direction.value
+                key = (field.col + dcol, field.row + drow)
+                neighbors[direction.index] = self._fields.get(key)
+            field._neighbors = tuple(neighbors)
+
+        self.flat = [
+            self._fields[col, row] for col in range(shape[0]) for row in range(shape[1])
+        ]
+        for index, field in enumerate(self.flat):
+            field.index = index
+
+    def __getitem__(self, key: tuple[int, int]) -> Field:
+        field = self._fields.get(key)
+        return Field(*key) if field is None else field
+
+    def __iter__(self) -> Iterator[Field]:
+        return iter(self.flat)
+
+    def __len__(self) -> int:
+        return self.shape[0] * self.shape[1]
+
+
+class Snake:
+    """The fields of the snake, from the head to the tail.
+
+    The fields are kept in a ring buffer, a list in which the head moves backwards
+    and the tail is cut off by shortening the snake, so moving and growing are O(1).
+    With ``fields``, the interned fields of the board, the buffer has the size of
+    the board and ``occupied`` marks the fields of the snake by their ``index``, so
+    ``field in snake`` is a lookup instead of a scan. ``Board`` shares ``occupied``.
+    Without ``fields``, the buffer doubles when it is full and ``occupied`` is
+    ``None``.
+    """
+
+    def __init__(
+        self,
+        pos: Field,
+        direction: Direction = Direction.LEFT,
+        fields: Optional[Fields] = None,
+    ):
         self.direction = direction
+        self.fields = fields
+        self.occupied = None if fields is None else bytearray(len(fields))
+
+        size = 2 if fields is None else max(len(fields), 2)
+        self._body: list[Optional[Field]] = [None] * size
+        self._start = 0
+        self._length = 0
+        self.extend([pos, pos - direction])
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[Field]:
+        body, start, stop = self._body, self._start, self._start + self._length
+        if stop <= len(body):
+            return iter(body[start:stop])  # type: ignore
+        return chain(body[start:], body[: stop - len(body)])  # type: ignore
+
+    def __reversed__(self) -> Iterator[Field]:
+        body, last = self._body, self._start + self._length - 1
+        for i in range(self._length):
+            yield body[(last - i) % len(body)]  # type: ignore
+
+    def __getitem__(self, index: int) -> Field:
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("snake index out of range")
+        return self._body[(self._start + index) % len(self._body)]  # type: ignore
+
+    def __contains__(self, field: Field) -> bool:
+        if self.occupied is None:
+            return any(field == _field for _field in self)
+
+        index = self._index(field)
+        return index >= 0 and self.occupied[index] == 1
 
-    def __iter(self):
-        super().__iter__()
+    def __eq__(self, other):
+        if not isinstance(other, Snake):
+            return NotImplemented
+        return len(self) == len(other) and all(map(Field.__eq__, self, other))
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self):
+        return f"Snake({list(self)}, direction={self.direction})"
+
+    def copy(self) -> "Snake":
+        snake = Snake.__new__(Snake)
+        snake.direction = self.direction
+        snake.fields = self.fields
+        snake.occupied = None if self.occupied is None else self.occupied[:]
+        snake._body = self._body.copy()
+        snake._start = self._start
+        snake._length = self._length
+        return snake
+
+    def appendleft(self, field: Field):
+        """Add ``field`` in front of the head."""
+        if self._length == len(self._body):
+            self._resize()
+        self._start = (self._start - 1) % len(self._body)
+        self._body[self._start] = field
+        self._length += 1
+        self._occupy(field, 1)
+
+    def append(self, field: Field):
+        """Add ``field`` behind the tail."""
+        if self._length == len(self._body):
+            self._resize()
+        self._body[(self._start + self._length) % len(self._body)] = field
+        self._length += 1
+        self._occupy(field, 1)
+
+    def extend(self, fields: Iterable[Field]):
+        for field in fields:
+            self.append(field)
+
+    def pop(self) -> Field:
+        """Remove the tail."""
+        if self._length == 0:
+            raise IndexError("pop from an empty snake")
+        self._length -= 1
+        index = (self._start + self._length) % len(self._body)
+        field = self._body[index]
+        self._body[index] = None
+        self._occupy(field, 0)  # type: ignore
+        return field  # type: ignore
 
     def move(self) -> tuple[Field, Field]:
         field = self.next_field()
@@ -80,6 +243,22 @@ class Snake(deque[Field]):
         empty = self.pop()
         return field, empty
 
+    def advance(self, fields: Sequence[Field]) -> list[Field]:
+        """Move the head onto ``fields``, one after the other, without growing.
+
+        Returns the fields the tail left, in order. Unlike ``move``, this doesn't
+        check for collisions.
+        """
+        if not fields:
+            return []
+
+        self.direction = fields[-1].diff(fields[-2] if len(fields) > 1 else self.head)
+        empty = []
+        for field in fields:
+            self.appendleft(field)
+            empty.append(self.pop())
+        return empty
+
     def grow(self) -> Field:
         field = self.next_field()
         self.appendleft(field)
@@ -90,7 +269,7 @@ class Snake(deque[Field]):
 
     @property
     def head(self) -> Field:
-        return self[0]
+        return self._body[self._start]  # type: ignore
 
     def turn(self, direction: Optional[Direction]):
         if (direction is not None) and (self.direction.opposite() != direction):
@@ -99,52 +278,177 @@ class Snake(deque[Field]):
     def admissible_directions(self):
         pass
 
+    def _index(self, field: Field) -> int:
+        index = field.index
+        if index < 0 and self.fields is not None:
+            # a fresh field on the board
+            index = self.fields[field.col, field.row].index
+        return index
+
+    def _occupy(self, field: Field, value: int):
+        if self.occupied is not None:
+            index = self._index(field)
+            if index >= 0:
+                self.occupied[index] = value
+
+    def _resize(self):
+        body = list(self)
+        self._body = body + [None] * len(body)  # type: ignore
+        self._start = 0
+
+
+class Board(Mapping[Field, Content]):
+    """The content of every field of the board.
+
+    The content is stored in ``grid``, a ``bytearray`` over the board padded by a one
+    field wide border, indexed by the ``cell`` of the fields. A cell holds the value
+    of its ``Content`` and ``BORDER`` on the border, so reading a field and checking
+    whether it is on the board is a single lookup. ``array`` is a numpy view of the
+    board for queries of the whole board. The board itself is a read-only mapping
+    of the fields of the board to their content with ``__setitem__`` on top.
+
+    The empty fields are additionally kept in ``free``, a list where removing is a
+    swap with the last element, and ``_free_index`` which maps every empty field to
+    its position in ``free``. Every write goes through ``__setitem__``, so spawning
+    an apple is a uniform ``rng.choice`` of ``free`` instead of a scan of the board.
+    ``moves`` counts the moves of the snake. ``occupied`` is the occupancy of the
+    snake, a ``bytearray`` over the flat index of the fields, so checking for the
+    snake doesn't need to hash the field.
+    """
 
-class Board(dict[Field, Content]):
     apple: Field
     snake: Snake
 
-    def __init__(self, shape: tuple[int, int]):
+    def __init__(self, shape: tuple[int, int], rng: Optional[random.Random] = None):
         self.shape = shape
+        self.fields = Fields(shape)
+        self.rng = random.Random() if rng is None else rng
+        self.moves = 0
 
-        super().__init__(
-            {
-                Field(col, row): Content.EMPTY
-                for col in range(shape[0])
-                for row in range(shape[1])
-            }
-        )
+        self.grid = bytearray((shape[0] + 2) * (shape[1] + 2))
+        for field in self.fields:
+            self.grid[field.cell] = Content.EMPTY.value
+        self.free = list(self.fields)
+        self._free_index = {field: index for index, field in enumerate(self.free)}
 
         self.init_snake()
 
         apple = self.new_apple()
         self[apple] = Content.APPLE
 
+    def __getitem__(self, field: Field) -> Content:
+        code = self.grid[self.cell(field)]
+        if code == BORDER:
+            raise KeyError(field)
+        return _CONTENTS[code]
+
+    def __setitem__(self, field: Field, content: Content):
+        cell = self.cell(field)
+        if self.grid[cell] == BORDER:
+            raise KeyError(field)
+
+        if content is Content.EMPTY:
+            if field not in self._free_index:
+                self._free_index[field] = len(self.free)
+                self.free.append(field)
+        else:
+            index = self._free_index.pop(field, None)
+            if index is not None:
+                last = self.free.pop()
+                if last is not field:
+                    self.free[index] = last
+                    self._free_index[last] = index
+        self.grid[cell] = content.value
+
+    def __contains__(self, field) -> bool:
+        return self.grid[self.cell(field)] != BORDER
+
+    def __iter__(self) -> Iterator[Field]:
+        return iter(self.fields)
+
+    def __len__(self) -> int:
+        return len(self.fields)
+
+    def get(self, field: Field, default: Optional[Content] = None) -> Optional[Content]:
+        code = self.grid[self.cell(field)]
+        return default if code == BORDER else _CONTENTS[code]
+
+    def cell(self, field: Field) -> int:
+        """The ``cell`` of ``field``, fields outside of the table map to the corner."""
+        cell = field.cell
+        if cell < 0:
+            cell = max(self.fields[field.col, field.row].cell, 0)
+        return cell
+
+    @property
+    def array(self) -> np.ndarray:
+        """A writable view of the grid without the border, indexed by ``col, row``."""
+        cols, rows = self.shape
+        grid = np.frombuffer(self.grid, dtype=np.uint8).reshape(cols + 2, rows + 2)
+        return grid[1:-1, 1:-1]
+
+    def copy(self, rng: Optional[random.Random] = None) -> "Board":
+        """A snapshot of the board which shares the interned fields.
+
+        The snapshot draws apples from ``rng``, not from the rng of this board.
+        """
+        board = Board.__new__(Board)
+        board.shape = self.shape
+        board.fields = self.fields
+        board.rng = random.Random() if rng is None else rng
+        board.moves = self.moves
+        board.grid = self.grid[:]
+        board.free = self.free.copy()
+        board._free_index = self._free_index.copy()
+        board.snake = self.snake.copy()
+        board.apple = self.apple
+        return board
+
+    @property
+    def occupied(self) -> Optional[bytearray]:
+        return self.snake.occupied
+
     def init_snake(self):
-        self.snake = Snake(Field(self.shape[0] // 2, self.shape[1] // 2))
+        pos = self.fields[self.shape[0] // 2, self.shape[1] // 2]
+        self.snake = Snake(pos, fields=self.fields)
         for field in self.snake:
             self[field] = Content.SNAKE
 
-    def update(self):
+    @timed("board.update")
+    def update(self) -> tuple[Field, Field]:
+        """Move the snake, returns the two fields whose content changed."""
+        self.moves += 1
         if self.snake.next_field() == self.apple:
             head = self.snake.grow()
             self[head] = Content.SNAKE
 
             apple = self.new_apple()
             self[apple] = Content.APPLE
-        else:
-            head, empty = self.snake.move()
-            if head not in self:
-                raise LoseError
+            return head, apple
+
+        head, empty = self.snake.move()
+        if head not in self:
+            raise LoseError
+
+        self[head] = Content.SNAKE
+        self[empty] = Content.EMPTY
+        return head, empty
 
+    @timed("board.advance")
+    def advance(self, fields: Sequence[Field]):
+        """Move the snake onto ``fields`` like as many calls of ``update``.
+
+        ``fields`` must be a path from the head which neither reaches the apple nor
+        runs into the snake, this is not checked.
+        """
+        self.moves += len(fields)
+        for head, empty in zip(fields, self.snake.advance(fields)):
             self[head] = Content.SNAKE
             self[empty] = Content.EMPTY
 
     def new_apple(self) -> Field:
         try:
-            self.apple = random.choice(
-                [key for key, value in self.items() if value is Content.EMPTY]
-            )
+            self.apple = self.rng.choice(self.free)
             return self.apple
         except IndexError as err:
             raise WinError from err
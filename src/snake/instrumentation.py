@@ -0,0 +1,125 @@
+import json
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Iterator, Optional, TypeVar
+
+import numpy as np
+
+from . import config
+
+__all__ = ["METRICS", "Metrics", "count", "timed", "timer"]
+
+F = TypeVar("F", bound=Callable)
+
+
+class Metrics:
+    """Timings of the hot paths and counters of what the AIs decided.
+
+    Timings are in seconds, ``events`` counts how often something happened. While
+    ``enabled`` is false, ``timed`` functions only pay for one attribute lookup and
+    ``count`` returns immediately.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.timings: defaultdict[str, list[float]] = defaultdict(list)
+        self.events: Counter[str] = Counter()
+
+    def reset(self):
+        self.timings.clear()
+        self.events.clear()
+
+    def histogram(self, name: str, bins: int = 20) -> tuple[np.ndarray, np.ndarray]:
+        """Counts and log-spaced bin edges (in ms) of the timings of ``name``."""
+        timings = np.asarray(self.timings.get(name, [])) * 1000
+        if len(timings) == 0:
+            return np.zeros(bins, dtype=int), np.zeros(bins + 1)
+
+        low, high = max(timings.min(), 1e-6), max(timings.max(), 1e-6)
+        edges = np.geomspace(low, high * (1 + 1e-9), bins + 1)
+        counts, _ = np.histogram(np.clip(timings, low, None), bins=edges)
+        return counts, edges
+
+    def summary(self) -> dict:
+        timings = {}
+        for name, values in sorted(self.timings.items()):
+            if not values:
+                continue
+            ms = np.asarray(values) * 1000
+            p50, p90, p99, pmax = np.percentile(ms, [50, 90, 99, 100])
+            timings[name] = {
+                "calls": len(ms),
+                "total_ms": float(ms.sum()),
+                "mean_ms": float(ms.mean()),
+                "p50_ms": float(p50),
+                "p90_ms": float(p90),
+                "p99_ms": float(p99),
+                "max_ms": float(pmax),
+            }
+        return {"timings": timings, "events": dict(sorted(self.events.items()))}
+
+    def to_json(self) -> str:
+        return json.dumps(self.summary(), indent=2)
+
+    def __str__(self) -> str:
+        summary = self.summary()
+        width = max(map(len, [*summary["timings"], *summary["events"], "timer"]))
+        header = (
+            f"{'timer':<{width}} {'calls':>8} {'total ms':>10} {'mean ms':>9} "
+            f"{'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+        )
+        lines = [header, "-" * len(header)]
+        for name, t in summary["timings"].items():
+            lines.append(
+                f"{name:<{width}} {t['calls']:>8} {t['total_ms']:>10.2f} "
+                f"{t['mean_ms']:>9.4f} {t['p50_ms']:>8.4f} {t['p99_ms']:>8.4f} "
+                f"{t['max_ms']:>8.4f}"
+            )
+        for name, value in summary["events"].items():
+            lines.append(f"{name:<{width}} {value:>8}")
+        return "\n".join(lines)
+
+
+METRICS = Metrics(enabled=config.INSTRUMENTATION)
+
+
+def timed(name: Optional[str] = None) -> Callable[[F], F]:
+    """Record the duration of every call of the decorated function as ``name``."""
+
+    def decorator(func: F) -> F:
+        key = func.__name__ if name is None else name
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not METRICS.enabled:
+                return func(*args, **kwargs)
+
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                METRICS.timings[key].append(time.perf_counter() - start)
+
+        return wrapper  # type: ignore
+
+    return decorator
+
+
+@contextmanager
+def timer(name: str) -> Iterator[None]:
+    if not METRICS.enabled:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        METRICS.timings[name].append(time.perf_counter() - start)
+
+
+def count(event: str):
+    if METRICS.enabled:
+        METRICS.events[event] += 1
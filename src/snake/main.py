@@ -1,30 +1,117 @@
 #!/usr/bin/env python
-import random
-import time
+from functools import lru_cache
+from typing import Iterable, Mapping, Optional
 
 import pygame as pg
 
 from .ai import BaseAI, SnakeAI, SnakeAIv2
 from .ai_cycle import CycleAI, SnakeAIv3
-from .config import BOARD_SIZE, FRAMES_PER_MOVE, WINSIZE
+from .background import BackgroundOptimizer
+from .config import BOARD_SIZE, BORDER_PX, FIELD_PX, FRAMES_PER_MOVE, GAP_PX, WINSIZE
 from .dtypes import Color, Content, Direction
 from .exceptions import LoseError, WinError
-from .game import Board
+from .game import Board, Field
+from .instrumentation import METRICS, timer
+from .recorder import Recorder
 
 
 def find_connected_regions():
     pass
 
 
+@lru_cache(maxsize=None)
+def _rect(col: int, row: int) -> pg.Rect:
+    left = BORDER_PX + col * FIELD_PX + col * GAP_PX
+    top = WINSIZE[1] - BORDER_PX - ((row + 1) * FIELD_PX + row * GAP_PX)
+    return pg.Rect(left, top, FIELD_PX, FIELD_PX)
+
+
+def field_rect(field: Field) -> pg.Rect:
+    return _rect(field.col, field.row)
+
+
+@lru_cache(maxsize=None)
+def _tile(col: int, row: int) -> pg.Rect:
+    # the field and half of the gap around it, the tiles cover the board
+    rect = _rect(col, row)
+    return pg.Rect(
+        rect.left - GAP_PX // 2,
+        rect.top - GAP_PX // 2,
+        rect.w + GAP_PX,
+        rect.h + GAP_PX,
+    )
+
+
+def _edge_rect(field: Field, target: Field) -> pg.Rect:
+    x1, y1 = field_rect(field).center
+    x2, y2 = field_rect(target).center
+
+    size = FIELD_PX // 3
+    size = size if (size % 2 == 0) else size + 1
+
+    left = min(x1, x2) - size // 2
+    top = min(y1, y2) - size // 2
+    width = abs(x1 - x2) + size
+    height = abs(y1 - y2) + size
+
+    return pg.Rect(left, top, width, height)
+
+
+_COLORS = {
+    Content.EMPTY: Color.GREY.value,
+    Content.SNAKE: Color.GREEN.value,
+    Content.APPLE: Color.RED.value,
+}
+
+
 def draw_board(surface, board):
     surface.fill(Color.BLACK.value)
     for field, content in board.items():
-        if content == Content.EMPTY:
-            _ = surface.fill(Color.GREY.value, field.rect)
-        elif content == Content.SNAKE:
-            _ = surface.fill(Color.GREEN.value, field.rect)
-        else:
-            _ = surface.fill(Color.RED.value, field.rect)
+        _ = surface.fill(_COLORS[content], field_rect(field))
+
+
+def draw_cycle(surface, cycle: Mapping[Field, Direction]):
+    for field, direction in cycle.items():
+        surface.fill(Color.LIGHTYELLOW.value, _edge_rect(field, field + direction))
+
+
+def draw_field(surface, board: Board, cycle: Mapping[Field, Direction], field: Field):
+    """Redraw the tile of ``field`` like ``draw_board`` and ``draw_cycle`` would.
+
+    The tile is the field with half of the gap around it, so it holds the field and
+    one half of each edge of the cycle into and out of the field. Returns the tile.
+    """
+    tile = _tile(field.col, field.row)
+    surface.set_clip(tile)
+    surface.fill(Color.BLACK.value, tile)
+    surface.fill(_COLORS[board[field]], field_rect(field))
+
+    for direction in Direction:
+        neighbor = field + direction
+        if neighbor not in cycle:
+            continue
+        if cycle[field] == direction or neighbor + cycle[neighbor] == field:
+            surface.fill(Color.LIGHTYELLOW.value, _edge_rect(field, neighbor))
+
+    surface.set_clip(None)
+    return tile
+
+
+def redraw(surface, ai: CycleAI, fields: Iterable[Field]) -> list[pg.Rect]:
+    """Redraw ``fields`` and the fields where the cycle of ``ai`` changed.
+
+    Returns the rects to pass to ``pg.display.update``.
+    """
+    changed = ai.pop_changed()
+    if changed is None:
+        draw_board(surface, ai.board)
+        draw_cycle(surface, ai.cycle)
+        return [surface.get_rect()]
+
+    return [
+        draw_field(surface, ai.board, ai.cycle, field)
+        for field in changed.union(fields)
+    ]
 
 
 def draw_ai_path(surface, ai: BaseAI):
@@ -35,7 +122,7 @@ def draw_ai_path(surface, ai: BaseAI):
 
     for direction in list(ai.directions)[:-1]:
         field += direction
-        _ = surface.fill(Color.LIGHTYELLOW.value, field.rect)
+        _ = surface.fill(Color.LIGHTYELLOW.value, field_rect(field))
 
 
 def draw_cycle_ai(surface, ai: CycleAI):
@@ -44,7 +131,7 @@ def draw_cycle_ai(surface, ai: CycleAI):
     position += ai.next()
 
     while position != apple:
-        _ = surface.fill(Color.LIGHTYELLOW.value, position.rect)
+        _ = surface.fill(Color.LIGHTYELLOW.value, field_rect(position))
         position += ai.next()
 
 
@@ -57,8 +144,18 @@ def set_text(text, x, y, fontSize):
     return (text, rect)
 
 
-def run(wait: bool = False, screenshot: bool = False):
-    random.seed()
+def run(
+    wait: bool = False,
+    screenshot: bool = False,
+    background: bool = False,
+    every: int = 1,
+    video: Optional[str] = None,
+):
+    """Play a game in a window.
+
+    With ``screenshot``, every ``every``-th frame is recorded into ``screenshots/``
+    or, with ``video``, encoded by ``ffmpeg`` into that file, see ``Recorder``.
+    """
     clock = pg.time.Clock()
     board = Board(BOARD_SIZE)
 
@@ -77,6 +174,9 @@ def run(wait: bool = False, screenshot: bool = False):
     # snake_ai = SnakeAIv2(board)
     # snake_ai = SnakeAIv3(board)
     cycle_ai = CycleAI(board)
+    # optimize on a worker thread, so slow splits and joins don't stall the frames
+    optimizer = BackgroundOptimizer(cycle_ai) if background else None
+    recorder = Recorder(every=every, video=video) if screenshot else None
 
     try:
         while not done:
@@ -96,22 +196,24 @@ def run(wait: bool = False, screenshot: bool = False):
                     if event.type == pg.QUIT:
                         done = True
                         break
-                start = time.time()
                 # direction = snake_ai.search_best_direction()
-                cycle_ai.optimize()
-                print(f"TIME: {1000 * (time.time() - start):.3f}")
+                if optimizer is None:
+                    cycle_ai.optimize()
+                else:
+                    optimizer.step()
                 direction = cycle_ai.next()
                 board.snake.turn(direction)
 
-                board.update()
-                draw_board(screen, board)
-                cycle_ai.cycle.draw(screen)
-                # draw_ai_path(screen, snake_ai)
-                # draw_cycle_ai(screen, cycle_ai)
+                changed = board.update()
+                with timer("draw"):
+                    # only the fields that changed are drawn again
+                    rects = redraw(screen, cycle_ai, changed)
+                    # draw_ai_path(screen, snake_ai)
+                    # draw_cycle_ai(screen, cycle_ai)
 
-                pg.display.update()
-                if screenshot:
-                    pg.image.save(screen, f"screenshots/img_{steps_counter:05d}.png")
+                    pg.display.update(rects)
+                if recorder is not None:
+                    recorder.record(screen)
                 steps_counter += 1
                 snake_lengths.append(len(cycle_ai.snake))
 
@@ -126,6 +228,15 @@ def run(wait: bool = False, screenshot: bool = False):
         text_with_coords = set_text("You win!", WINSIZE[0] // 2, WINSIZE[1] // 2, 48)
         screen.blit(*text_with_coords)
         pg.display.update()
+    finally:
+        # also when 'record' raised the error of a writer
+        if optimizer is not None:
+            optimizer.close()
+        if recorder is not None:
+            recorder.close()
+
+    if METRICS.enabled:
+        print(METRICS)
 
     pg.event.set_allowed(pg.QUIT)
     pg.event.set_allowed(pg.KEYUP)
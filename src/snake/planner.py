@@ -0,0 +1,191 @@
+import heapq
+from collections import deque
+from typing import Optional
+
+from .game import Board, Direction, Field
+from .search import DIRECTIONS
+
+INF = 1 << 30
+
+
+class Planner:
+    """Shortest paths to the apple from a BFS distance field over the board.
+
+    ``dist[cell]`` is the number of moves from ``cell`` to the apple, ``INF`` if the
+    apple can't be reached. Snake fields are blocked. With ``admissible=True`` moves
+    follow the parity rules of ``SnakeAIv2._get_admissible_directions``, so the field
+    is over a directed graph. Cells are indices into the board padded by a border,
+    like in ``PathSearch``.
+
+    ``update`` recomputes the field when the apple changed. If the snake only moved,
+    i.e. the new head got blocked and the old tail got freed, the field is repaired
+    around these two cells instead.
+    """
+
+    def __init__(self, shape: tuple[int, int], admissible: bool = False):
+        self.shape = shape
+        self.admissible = admissible
+
+        cols, rows = shape
+        stride = rows + 2
+        self._stride = stride
+        self._size = (cols + 2) * stride
+        self._delta = [
+            dcol * stride + drow for dcol, drow in (d.value for d in Direction)
+        ]
+
+        self._border = bytearray(self._size)
+        self._succ: list[list[int]] = [[] for _ in range(self._size)]
+        self._codes: list[list[int]] = [[] for _ in range(self._size)]
+        self._pred: list[list[int]] = [[] for _ in range(self._size)]
+        for index in range(self._size):
+            col, row = index // stride - 1, index % stride - 1
+            if not (0 <= col < cols and 0 <= row < rows):
+                self._border[index] = 1
+                continue
+
+            codes = (
+                (0 if row % 2 == 0 else 1, 3 if col % 2 == 0 else 2)
+                if admissible
+                else (0, 1, 2, 3)
+            )
+            self._codes[index] = list(codes)
+            self._succ[index] = [index + self._delta[code] for code in codes]
+
+        for index, succ in enumerate(self._succ):
+            for neighbor in succ:
+                if not self._border[neighbor]:
+                    self._pred[neighbor].append(index)
+
+        self.dist = [INF] * self._size
+        self._blocked = self._border[:]
+        self._apple = -1
+        self._head = -1
+        self._tail = -1
+        self._length = 0
+
+    def index(self, field: Field) -> int:
+        return (field.col + 1) * self._stride + field.row + 1
+
+    def update(self, board: Board):
+        snake = board.snake
+        head, tail = self.index(snake.head), self.index(snake[-1])
+        apple = self.index(board.apple)
+
+        if (head, apple, len(snake)) == (self._head, self._apple, self._length):
+            return
+
+        moved = (
+            apple == self._apple
+            and len(snake) == self._length
+            and len(snake) > 1
+            and self.index(snake[1]) == self._head
+        )
+        if moved:
+            self._free(self._tail)
+            self._block(head)
+        else:
+            self._blocked = self._border[:]
+            for field in snake:
+                self._blocked[self.index(field)] = 1
+            self._apple = apple
+            self._bfs()
+
+        self._head, self._tail, self._length = head, tail, len(snake)
+
+    def next_direction(self, board: Board) -> Optional[Direction]:
+        """The first move of a shortest path of the head to the apple, if any."""
+        self.update(board)
+
+        head = self._head
+        back = DIRECTIONS.index(board.snake.direction) ^ 1
+        best, best_dist = None, INF
+        for code, neighbor in zip(self._codes[head], self._succ[head]):
+            if code != back and self.dist[neighbor] < best_dist:
+                best, best_dist = code, self.dist[neighbor]
+        return None if best is None else DIRECTIONS[best]
+
+    def path(self, board: Board) -> Optional[list[Direction]]:
+        """A shortest path of the head to the apple, if any."""
+        direction = self.next_direction(board)
+        if direction is None:
+            return None
+
+        path = [direction]
+        cell = self._head + self._delta[DIRECTIONS.index(direction)]
+        while cell != self._apple:
+            code = min(
+                zip(self._codes[cell], self._succ[cell]),
+                key=lambda item: self.dist[item[1]],
+            )[0]
+            path.append(DIRECTIONS[code])
+            cell += self._delta[code]
+        return path
+
+    def _bfs(self):
+        dist, blocked, pred = [INF] * self._size, self._blocked, self._pred
+        dist[self._apple] = 0
+        queue = deque([self._apple])
+        while queue:
+            cell = queue.popleft()
+            for neighbor in pred[cell]:
+                if not blocked[neighbor] and dist[neighbor] == INF:
+                    dist[neighbor] = dist[cell] + 1
+                    queue.append(neighbor)
+        self.dist = dist
+
+    def _free(self, cell: int):
+        dist, blocked, pred = self.dist, self._blocked, self._pred
+        blocked[cell] = 0
+
+        best = min((dist[neighbor] for neighbor in self._succ[cell]), default=INF)
+        if best == INF:
+            return
+        dist[cell] = best + 1
+
+        # distances only decrease, starting at 'cell'
+        queue = deque([cell])
+        while queue:
+            cell = queue.popleft()
+            for neighbor in pred[cell]:
+                if not blocked[neighbor] and dist[neighbor] > dist[cell] + 1:
+                    dist[neighbor] = dist[cell] + 1
+                    queue.append(neighbor)
+
+    def _block(self, cell: int):
+        dist, blocked, pred, succ = self.dist, self._blocked, self._pred, self._succ
+        blocked[cell] = 1
+        if dist[cell] == INF:
+            return
+
+        # invalidate, level by level, the cells whose every shortest path went
+        # through 'cell'
+        affected = []
+        queue = deque([(cell, dist[cell])])
+        dist[cell] = INF
+        while queue:
+            cell, old = queue.popleft()
+            for neighbor in pred[cell]:
+                if dist[neighbor] != old + 1:
+                    continue
+                if any(dist[s] == old for s in succ[neighbor]):
+                    continue
+                dist[neighbor] = INF
+                affected.append(neighbor)
+                queue.append((neighbor, old + 1))
+
+        # and settle them again from their unaffected successors
+        heap = []
+        for cell in affected:
+            best = min(dist[neighbor] for neighbor in succ[cell])
+            if best < INF:
+                heap.append((best + 1, cell))
+        heapq.heapify(heap)
+        while heap:
+            value, cell = heapq.heappop(heap)
+            if value >= dist[cell]:
+                continue
+            dist[cell] = value
+            for neighbor in pred[cell]:
+                if not blocked[neighbor] and dist[neighbor] > value + 1:
+                    heapq.heappush(heap, (value + 1, neighbor))
@@ -0,0 +1,158 @@
+import queue
+import shutil
+import struct
+import subprocess
+import threading
+import warnings
+import zlib
+from pathlib import Path
+from typing import Optional, Union
+
+import pygame as pg
+
+from .instrumentation import timer
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+class Recorder:
+    """Record frames of the game without the game loop waiting for the disk.
+
+    ``record`` copies the surface into a raw RGB buffer and puts it into a queue of
+    at most ``maxsize`` frames. The game loop only waits when the writers are that
+    far behind. ``workers`` threads encode the frames as ``img_00000.png``,
+    ``img_00001.png``, ... into ``directory``, with ``zlib`` which, unlike
+    ``pg.image.save``, releases the GIL while compressing. With ``video`` and a local
+    ``ffmpeg``, the raw frames are piped to ``ffmpeg`` instead, which encodes the
+    video in its own process. Only every ``every``-th frame is recorded.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path] = "screenshots",
+        every: int = 1,
+        workers: int = 2,
+        maxsize: int = 64,
+        video: Optional[Union[str, Path]] = None,
+        fps: int = 30,
+    ):
+        if every < 1:
+            raise ValueError("'every' must be at least 1.")
+
+        self.directory = Path(directory)
+        self.every = every
+        self.video = video
+        self.fps = fps
+        self.frames = 0
+        self.recorded = 0
+
+        if video is not None and shutil.which("ffmpeg") is None:
+            warnings.warn("ffmpeg is not installed, recording PNGs instead.")
+            self.video = None
+        if self.video is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._queue: queue.Queue[Optional[tuple[int, tuple[int, int], bytes]]] = (
+            queue.Queue(maxsize=maxsize)
+        )
+        self._ffmpeg: Optional[subprocess.Popen[bytes]] = None
+        self._error: Optional[BaseException] = None
+        # the frames must reach ffmpeg in order
+        self._writers = [
+            threading.Thread(target=self._write, daemon=True)
+            for _ in range(1 if self.video is not None else workers)
+        ]
+        for writer in self._writers:
+            writer.start()
+
+    def record(self, surface: pg.Surface):
+        if self._error is not None:
+            raise self._error
+
+        self.frames += 1
+        if (self.frames - 1) % self.every != 0:
+            return
+
+        size = surface.get_size()
+        if self.video is not None and self._ffmpeg is None:
+            self._ffmpeg = self._start_ffmpeg(size)
+
+        with timer("record"):
+            self._queue.put((self.recorded, size, pg.image.tobytes(surface, "RGB")))
+        self.recorded += 1
+
+    def close(self):
+        """Write the remaining frames and wait for the writers."""
+        for _ in self._writers:
+            self._queue.put(None)
+        for writer in self._writers:
+            writer.join()
+
+        if self._ffmpeg is not None:
+            if self._ffmpeg.stdin is not None:
+                self._ffmpeg.stdin.close()
+            self._ffmpeg.wait()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self) -> "Recorder":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _start_ffmpeg(self, size: tuple[int, int]) -> subprocess.Popen[bytes]:
+        width, height = size
+        # like movie/make
+        command = [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}",
+            "-r", str(self.fps), "-i", "-",
+            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+            "-codec:v", "libx264", "-pix_fmt", "yuv420p", "-crf", "28", "-an",
+            str(self.video),
+        ]  # fmt: skip
+        return subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def _write(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                continue
+
+            index, size, frame = item
+            try:
+                if self._ffmpeg is None:
+                    path = self.directory / f"img_{index:05d}.png"
+                    path.write_bytes(encode_png(frame, size))
+                elif self._ffmpeg.stdin is not None:
+                    self._ffmpeg.stdin.write(frame)
+            except OSError as err:
+                self._error = err
+
+
+def encode_png(frame: bytes, size: tuple[int, int], level: int = 6) -> bytes:
+    """Encode raw RGB pixels, row by row from the top, as a PNG."""
+    width, height = size
+    stride = 3 * width
+    # every row starts with its filter type, 0 is no filter
+    rows = b"".join(
+        b"\x00" + frame[row * stride : (row + 1) * stride] for row in range(height)
+    )
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"".join(
+        [
+            _PNG_SIGNATURE,
+            _chunk(b"IHDR", header),
+            _chunk(b"IDAT", zlib.compress(rows, level)),
+            _chunk(b"IEND", b""),
+        ]
+    )
+
+
+def _chunk(kind: bytes, data: bytes) -> bytes:
+    crc = zlib.crc32(kind + data)
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", crc)
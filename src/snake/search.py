@@ -0,0 +1,178 @@
+from typing import Iterable, Optional
+
+from .dtypes import Content
+from .game import Board, Direction, Field
+from .instrumentation import timed
+
+# directions are encoded by their position in 'Direction', so 'code ^ 1' is the
+# opposite direction
+DIRECTIONS = list(Direction)
+
+
+class PathSearch:
+    """Depth-first search of a path from the head of the snake to the apple.
+
+    This is the search of ``SnakeAI`` (``admissible=False``) and of ``SnakeAIv2`` and
+    ``SnakeAIv3`` (``admissible=True``) without recursion. Cells are integer indices
+    into the board padded by a blocked border, ``visited`` is a ``bytearray`` and an
+    explicit stack holds the remaining candidates of every cell on the current path.
+
+    The order in which paths are tried is the one of the recursive search: a cell
+    stays visited after the search backtracked from it, and the candidates of a cell
+    are fixed when the cell is entered. Ties between equally good candidates are
+    broken by the order of ``Direction``.
+    """
+
+    def __init__(self, shape: tuple[int, int], admissible: bool = False):
+        self.shape = shape
+        self.admissible = admissible
+
+        cols, rows = shape
+        stride = rows + 2
+        self._stride = stride
+        self._size = (cols + 2) * stride
+        self._delta = [
+            dcol * stride + drow for dcol, drow in (d.value for d in Direction)
+        ]
+
+        self._col = [index // stride - 1 for index in range(self._size)]
+        self._row = [index % stride - 1 for index in range(self._size)]
+        self._border = bytearray(
+            not (0 <= col < cols and 0 <= row < rows)
+            for col, row in zip(self._col, self._row)
+        )
+
+        # the two directions of 'SnakeAIv2._get_admissible_directions', in the
+        # order of 'Direction'
+        self._admissible = [
+            (0 if row % 2 == 0 else 1, 3 if col % 2 == 0 else 2)
+            for col, row in zip(self._col, self._row)
+        ]
+        self._all = (0, 1, 2, 3)
+
+    def index(self, field: Field) -> int:
+        return (field.col + 1) * self._stride + field.row + 1
+
+    @timed("path_search")
+    def search(self, board: Board, direction: Direction) -> Optional[list[Direction]]:
+        """The directions from the head of the snake to the apple, if there is a path.
+
+        ``direction`` is the current direction of the snake, the search never starts
+        by turning around.
+        """
+        blocked = self._border[:]
+        for field in board.snake:
+            blocked[self.index(field)] = 1
+
+        path = self._search(
+            self.index(board.snake.head),
+            DIRECTIONS.index(direction),
+            self.index(board.apple),
+            blocked,
+        )
+        return None if path is None else [DIRECTIONS[code] for code in path]
+
+    def _search(
+        self, head: int, direction: int, apple: int, blocked: bytearray
+    ) -> Optional[list[int]]:
+        if head == apple:
+            return []
+
+        visited = bytearray(self._size)
+        visited[head] = 1
+
+        cells = [head]
+        path: list[int] = []
+        stack = [iter(self._candidates(head, direction, apple, blocked, visited))]
+        delta = self._delta
+        while stack:
+            for code in stack[-1]:
+                cell = cells[-1] + delta[code]
+                path.append(code)
+                if cell == apple:
+                    return path
+
+                visited[cell] = 1
+                cells.append(cell)
+                stack.append(
+                    iter(self._candidates(cell, code, apple, blocked, visited))
+                )
+                break
+            else:
+                stack.pop()
+                cells.pop()
+                if path:
+                    path.pop()
+        return None
+
+    def _candidates(
+        self,
+        cell: int,
+        direction: int,
+        apple: int,
+        blocked: bytearray,
+        visited: bytearray,
+    ) -> list[int]:
+        col, row, delta = self._col, self._row, self._delta
+        apple_col, apple_row = col[apple], row[apple]
+
+        def dist(index: int) -> int:
+            return abs(col[index] - apple_col) + abs(row[index] - apple_row)
+
+        here = dist(cell)
+        codes = self._admissible[cell] if self.admissible else self._all
+
+        keys = []
+        for code in codes:
+            neighbor = cell + delta[code]
+            if code == direction ^ 1 or blocked[neighbor] or visited[neighbor]:
+                continue
+
+            there = dist(neighbor)
+            if self.admissible:
+                # 'SnakeAIv2._sort_directions'
+                if code == direction or there == here:
+                    tie = 0
+                else:
+                    tie = -1 if there < here else 1
+            else:
+                # 'SnakeAI._search': going straight on is tried last if the
+                # snake is moving away from the apple
+                moving_away = dist(cell - delta[direction]) < here
+                tie = 1 if code == direction and moving_away else 0
+            keys.append((there, tie, code))
+
+        keys.sort()
+        return [code for _, _, code in keys]
+
+
+def plan_is_safe(board: Board, plan: Iterable[Direction]) -> bool:
+    """Whether following ``plan`` from the head reaches the apple without collision.
+
+    The snake only grows when it eats the apple at the end of the plan, so a field
+    of the snake is safe at the i-th move if the tail left it before, i.e. if it is
+    one of the last ``i - 1`` fields of the snake. This costs O(len(plan)).
+    """
+    plan = list(plan)
+    if not plan:
+        return False
+
+    snake = board.snake
+    # number of moves after which a field at the end of the snake is free
+    free_after = {}
+    for moves, field in enumerate(reversed(snake), start=1):
+        if moves >= len(plan):
+            break
+        free_after[field] = moves
+
+    field = snake.head
+    for move, direction in enumerate(plan, start=1):
+        field = field + direction
+        content = board.get(field)
+        if content is None:
+            return False
+        if content is Content.SNAKE and free_after.get(field, move) >= move:
+            return False
+        if field == board.apple:
+            return move == len(plan)
+    return False
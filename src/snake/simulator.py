@@ -0,0 +1,158 @@
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Union
+
+from .ai import BaseAI, SnakeAI, SnakeAIv2, SnakeAIv4
+from .ai_cycle import CycleAI, SnakeAIv3
+from .dtypes import Direction
+from .exceptions import LoseError, WinError
+from .game import Board
+
+AIS: dict[str, type] = {
+    "cycle": CycleAI,
+    "snake": SnakeAI,
+    "snake_v2": SnakeAIv2,
+    "snake_v3": SnakeAIv3,
+    "snake_v4": SnakeAIv4,
+}
+
+
+@dataclass
+class GameStats:
+    ai: str
+    shape: tuple[int, int]
+    seed: Optional[int]
+    steps: int
+    apples: int
+    length: int
+    won: bool
+    lost: bool
+    duration: float
+    latencies: list[float] = field(default_factory=list, repr=False)
+    error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.won or self.lost
+
+    @property
+    def apples_per_step(self) -> float:
+        return self.apples / self.steps if self.steps else 0.0
+
+
+class Simulator:
+    """Play one game of snake without a display.
+
+    ``ai`` is either a key of ``AIS`` or an AI class taking the board. The game runs
+    as fast as the AI allows, there is no frame clock and pygame is never imported.
+    ``compact``, ``budget`` and ``exhaustive`` are passed on to ``CycleAI``. With
+    ``fast_forward``, the snake of a ``CycleAI`` follows its cycle in one go for as
+    long as ``CycleAI.idle_path`` allows, which ends in the same state as single
+    steps. These steps don't ask the AI, so they have no latency.
+    """
+
+    def __init__(
+        self,
+        shape: tuple[int, int],
+        ai: Union[str, type] = "cycle",
+        seed: Optional[int] = None,
+        compact: bool = True,
+        budget: Optional[float] = None,
+        exhaustive: bool = False,
+        fast_forward: bool = False,
+    ):
+        self.shape = shape
+        self.seed = seed
+        self.name = ai if isinstance(ai, str) else ai.__name__
+        self.board = Board(shape, rng=random.Random(seed))
+
+        ai_cls = AIS[ai] if isinstance(ai, str) else ai
+        if issubclass(ai_cls, CycleAI):
+            self.ai: Union[CycleAI, BaseAI] = ai_cls(
+                self.board, compact=compact, budget=budget, exhaustive=exhaustive
+            )
+        else:
+            self.ai = ai_cls(self.board)
+
+        self.fast_forward = fast_forward
+        self.steps = 0
+        self.apples = 0
+        self.won = False
+        self.lost = False
+        self.latencies: list[float] = []
+
+    @property
+    def finished(self) -> bool:
+        return self.won or self.lost
+
+    def next_direction(self) -> Optional[Direction]:
+        if isinstance(self.ai, CycleAI):
+            self.ai.optimize()
+            return self.ai.next()
+
+        try:
+            return self.ai.search_best_direction()
+        except LoseError:
+            # the snake is trapped, it runs into whatever is ahead
+            return None
+
+    def step(self):
+        if self.finished:
+            return
+
+        snake = self.board.snake
+        start = time.perf_counter()
+        direction = self.next_direction()
+        self.latencies.append(time.perf_counter() - start)
+
+        snake.turn(direction)
+        length = len(snake)
+
+        try:
+            self.board.update()
+        except WinError:
+            self.won = True
+        except LoseError:
+            self.lost = True
+
+        self.steps += 1
+        self.apples += len(snake) - length
+
+    def skip(self, max_steps: Optional[int] = None) -> int:
+        """Follow the cycle of a ``CycleAI`` for as long as it won't change.
+
+        Returns the number of steps, at most ``max_steps``.
+        """
+        if self.finished or not isinstance(self.ai, CycleAI):
+            return 0
+
+        path = self.ai.idle_path()[:max_steps]
+        self.board.advance(path)
+        self.steps += len(path)
+        return len(path)
+
+    def run(self, max_steps: Optional[int] = None) -> GameStats:
+        start = time.perf_counter()
+        while not self.finished and (max_steps is None or self.steps < max_steps):
+            if self.fast_forward:
+                self.skip(None if max_steps is None else max_steps - self.steps)
+                if max_steps is not None and self.steps >= max_steps:
+                    break
+            self.step()
+
+        return self.stats(time.perf_counter() - start)
+
+    def stats(self, duration: float = 0.0) -> GameStats:
+        return GameStats(
+            ai=self.name,
+            shape=self.shape,
+            seed=self.seed,
+            steps=self.steps,
+            apples=self.apples,
+            length=len(self.board.snake),
+            won=self.won,
+            lost=self.lost,
+            duration=duration,
+            latencies=self.latencies,
+        )
@@ -0,0 +1,205 @@
+import argparse
+import json
+import math
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from itertools import product
+from typing import Iterable, Optional
+
+import numpy as np
+
+from .simulator import AIS, GameStats, Simulator
+
+# games without a 'max_steps' end as timeouts after this many steps per field
+STEPS_PER_FIELD = 100
+
+
+@dataclass(frozen=True)
+class Game:
+    ai: str
+    shape: tuple[int, int]
+    seed: int
+    max_steps: Optional[int] = None
+
+
+@dataclass
+class Summary:
+    ai: str
+    shape: tuple[int, int]
+    games: int
+    wins: int
+    losses: int
+    timeouts: int
+    errors: int
+    steps_to_win: float
+    apples_per_step: float
+    latency_p50: float
+    latency_p90: float
+    latency_p99: float
+    latency_max: float
+
+
+class Report:
+    """Merged statistics of many games, grouped by AI and board size.
+
+    Latencies are the time the AI needed to pick a move, in milliseconds.
+    """
+
+    def __init__(self, games: Iterable[GameStats], duration: float = 0.0):
+        self.games = list(games)
+        self.duration = duration
+
+    def summaries(self) -> list[Summary]:
+        groups: dict[tuple[str, tuple[int, int]], list[GameStats]] = defaultdict(list)
+        for game in self.games:
+            groups[game.ai, game.shape].append(game)
+
+        return [
+            _summarize(ai, shape, games)
+            for (ai, shape), games in sorted(groups.items())
+        ]
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "duration": self.duration,
+                "summaries": [
+                    {key: _finite(value) for key, value in asdict(summary).items()}
+                    for summary in self.summaries()
+                ],
+            },
+            indent=2,
+            allow_nan=False,
+        )
+
+    def __str__(self) -> str:
+        header = (
+            f"{'ai':<10} {'board':>9} {'games':>6} {'wins':>5} {'lost':>5} "
+            f"{'timeout':>7} {'error':>5} {'steps/win':>10} {'apples/step':>11} "
+            f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+        )
+        lines = [header, "-" * len(header)]
+        for s in self.summaries():
+            board = f"{s.shape[0]}x{s.shape[1]}"
+            lines.append(
+                f"{s.ai:<10} {board:>9} {s.games:>6} {s.wins:>5} {s.losses:>5} "
+                f"{s.timeouts:>7} {s.errors:>5} {s.steps_to_win:>10.1f} "
+                f"{s.apples_per_step:>11.4f} {s.latency_p50:>8.3f} "
+                f"{s.latency_p90:>8.3f} {s.latency_p99:>8.3f} {s.latency_max:>8.3f}"
+            )
+        lines.append(f"total wall time: {self.duration:.2f} s")
+        return "\n".join(lines)
+
+
+def _finite(value):
+    # JSON has no NaN, statistics without any games to average are null
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+def _summarize(ai: str, shape: tuple[int, int], games: list[GameStats]) -> Summary:
+    won = [game for game in games if game.won]
+    steps = sum(game.steps for game in games)
+    latencies = np.concatenate([np.asarray(game.latencies) for game in games])
+    p50, p90, p99, pmax = (
+        np.percentile(latencies * 1000, [50, 90, 99, 100])
+        if len(latencies)
+        else (np.nan,) * 4
+    )
+
+    return Summary(
+        ai=ai,
+        shape=shape,
+        games=len(games),
+        wins=len(won),
+        losses=sum(game.lost for game in games),
+        timeouts=sum(not game.finished and game.error is None for game in games),
+        errors=sum(game.error is not None for game in games),
+        steps_to_win=float(np.mean([game.steps for game in won])) if won else np.nan,
+        apples_per_step=sum(game.apples for game in games) / steps if steps else 0.0,
+        latency_p50=float(p50),
+        latency_p90=float(p90),
+        latency_p99=float(p99),
+        latency_max=float(pmax),
+    )
+
+
+def play(game: Game) -> GameStats:
+    simulator = Simulator(game.shape, game.ai, seed=game.seed)
+    max_steps = game.max_steps
+    if max_steps is None:
+        max_steps = STEPS_PER_FIELD * game.shape[0] * game.shape[1]
+
+    start = time.perf_counter()
+    try:
+        stats = simulator.run(max_steps)
+    except Exception as err:
+        stats = simulator.stats(time.perf_counter() - start)
+        stats.error = f"{type(err).__name__}: {err}"
+    return stats
+
+
+def run_tournament(
+    ais: Iterable[str],
+    shapes: Iterable[tuple[int, int]],
+    seeds: Iterable[int],
+    max_steps: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> Report:
+    """Play every combination of AI, board size and seed on a process pool.
+
+    Without ``max_steps``, a game is stopped after ``STEPS_PER_FIELD`` steps per
+    field of the board and counts as a timeout.
+    """
+    games = [
+        Game(ai, shape, seed, max_steps)
+        for ai, shape, seed in product(ais, shapes, seeds)
+    ]
+
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    chunksize = max(1, len(games) // (4 * workers))
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = list(map(play, games))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(play, games, chunksize=chunksize))
+    return Report(results, time.perf_counter() - start)
+
+
+def _shape(value: str) -> tuple[int, int]:
+    cols, rows = value.lower().split("x")
+    return int(cols), int(rows)
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Play many seeded games of snake.")
+    parser.add_argument("--ai", nargs="+", default=["cycle"], choices=sorted(AIS))
+    parser.add_argument("--size", nargs="+", type=_shape, default=[(16, 10)])
+    parser.add_argument("--games", type=int, default=10, help="seeds per AI and size")
+    parser.add_argument("--seed", type=int, default=0, help="first seed")
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=None,
+        help=f"steps before a game times out (default: {STEPS_PER_FIELD} per field)",
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = run_tournament(
+        args.ai,
+        args.size,
+        range(args.seed, args.seed + args.games),
+        max_steps=args.max_steps,
+        workers=args.workers,
+    )
+    print(report.to_json() if args.json else report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+from itertools import count
+from typing import Iterable, Optional, Protocol
+
+from . import config
+from .dtypes import Validation
+from .game import Field
+
+_operations = count(1)
+
+
+class Validatable(Protocol):
+    def is_valid_or_raise(self) -> None: ...
+
+    def check_splice(self, fields: Iterable[Field]) -> None: ...
+
+
+def validate(cycle: Validatable, fields: Optional[Iterable[Field]] = None):
+    """Validate ``cycle`` according to ``config.CYCLE_VALIDATION``.
+
+    ``always`` runs the full O(N) check on every call. ``sampled`` runs it on every
+    ``config.CYCLE_VALIDATION_SAMPLE_RATE``-th call and otherwise only checks the
+    successors of ``fields``, i.e. the splice that was just done. ``off`` skips
+    validation altogether.
+    """
+    mode = Validation(config.CYCLE_VALIDATION)
+
+    if mode is Validation.OFF:
+        return
+    if mode is Validation.ALWAYS:
+        cycle.is_valid_or_raise()
+    elif next(_operations) % config.CYCLE_VALIDATION_SAMPLE_RATE == 0:
+        cycle.is_valid_or_raise()
+    elif fields is not None:
+        cycle.check_splice(fields)
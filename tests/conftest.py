@@ -0,0 +1,11 @@
+import pytest
+
+from snake.instrumentation import METRICS
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    monkeypatch.setattr(METRICS, "enabled", True)
+    METRICS.reset()
+    yield METRICS
+    METRICS.reset()
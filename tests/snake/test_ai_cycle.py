@@ -1,9 +1,21 @@
+import random
+import time
+
 import pytest
 
-from snake.ai_cycle import Cycle, HamiltonianCycle
-from snake.dtypes import Direction
-from snake.exceptions import InvalidCycleError
-from snake.game import Field
+from snake import config
+from snake.ai_cycle import (
+    Cycle,
+    CycleAI,
+    HamiltonianCycle,
+    join_adjoint_cycles,
+    join_points,
+    shortcut,
+)
+from snake.cycle_array import ArrayCycle, array_shortcuts
+from snake.dtypes import Direction, Validation
+from snake.exceptions import CycleError, InvalidCycleError, WinError
+from snake.game import Board, Field, Snake
 
 
 class Test:
@@ -41,3 +53,302 @@ class Test:
 class TestHamiltonianCycle:
     def test(self):
         _ = HamiltonianCycle(20, 20)
+
+    @pytest.mark.parametrize(
+        "shape", [(2, 2), (4, 4), (8, 6), (6, 8), (16, 10), (5, 7)]
+    )
+    def test_same_as_merging_blocks(self, shape):
+        directions = [Direction.UP, Direction.RIGHT, Direction.DOWN, Direction.LEFT]
+
+        def block(col, row):
+            fields = [Field(col, row)]
+            for direction in directions[:-1]:
+                fields.append(fields[-1] + direction)
+            return Cycle(fields, directions)
+
+        expected = block(0, 0)
+        for col in range(0, shape[0], 2):
+            for row in range(0, shape[1], 2):
+                expected = expected + block(col, row)
+
+        assert dict(HamiltonianCycle(*shape)) == dict(expected)
+
+
+class TestValidation:
+    def test_off(self, monkeypatch):
+        monkeypatch.setattr(config, "CYCLE_VALIDATION", Validation.OFF)
+        _ = Cycle((Field(1, 1),), (Direction.UP,))
+
+    def test_always(self, monkeypatch):
+        monkeypatch.setattr(config, "CYCLE_VALIDATION", Validation.ALWAYS)
+        with pytest.raises(InvalidCycleError):
+            _ = Cycle((Field(1, 1),), (Direction.UP,))
+
+    def test_sampled_checks_splice(self, monkeypatch):
+        monkeypatch.setattr(config, "CYCLE_VALIDATION", Validation.SAMPLED)
+        monkeypatch.setattr(config, "CYCLE_VALIDATION_SAMPLE_RATE", 10**9)
+
+        cycle = Cycle((Field(1, 1),), (Direction.UP,))
+        cycle.validate()
+        with pytest.raises(InvalidCycleError):
+            cycle.validate([Field(1, 1)])
+
+    def test_sampled_split(self, monkeypatch):
+        monkeypatch.setattr(config, "CYCLE_VALIDATION", Validation.SAMPLED)
+        monkeypatch.setattr(config, "CYCLE_VALIDATION_SAMPLE_RATE", 10**9)
+
+        cycle1, cycle2 = HamiltonianCycle(8, 6).split(Field(2, 3))
+        assert len(cycle1) + len(cycle2) == 48
+
+
+class TestJoinAdjointCycles:
+    @pytest.mark.parametrize("skip", [0, 1, 2])
+    def test_skip(self, skip):
+        cycle1, cycle2 = HamiltonianCycle(8, 6).split(Field(2, 3))
+        array_cycle1, array_cycle2 = ArrayCycle.from_cycle(
+            HamiltonianCycle(8, 6), (8, 6)
+        ).split(Field(2, 3))
+
+        joined = join_adjoint_cycles(cycle1, cycle2, Field(2, 0), skip=skip)
+        array_joined = join_adjoint_cycles(
+            array_cycle1, array_cycle2, Field(2, 0), skip=skip
+        )
+
+        assert len(joined) == 48
+        assert array_joined == joined
+
+    def test_join_points(self):
+        cycle1, cycle2 = HamiltonianCycle(8, 6).split(Field(2, 3))
+        array_cycle1, array_cycle2 = ArrayCycle.from_cycle(
+            HamiltonianCycle(8, 6), (8, 6)
+        ).split(Field(2, 3))
+        invalid_fields = [Field(2, 1), Field(3, 1)]
+
+        points = join_points(cycle1, cycle2, Field(2, 0), invalid_fields)
+        array_points = join_points(
+            array_cycle1, array_cycle2, Field(2, 0), invalid_fields
+        )
+
+        assert len(points) > 3
+        assert array_points == points
+        assert not set(points) & {Field(2, 0), *invalid_fields}
+        assert join_points(cycle1, cycle2, Field(2, 0), invalid_fields, 2) == points[:2]
+        assert (
+            join_points(array_cycle1, array_cycle2, Field(2, 0), invalid_fields, 2)
+            == points[:2]
+        )
+
+        # following the cycle from the start
+        dists = [cycle1.dist(Field(2, 0), point) for point in points]
+        assert dists == sorted(dists)
+
+
+class TestShortcut:
+    @pytest.mark.parametrize("compact", [False, True])
+    @pytest.mark.parametrize("skip", [0, 1])
+    def test_same_as_split_and_join(self, compact, skip):
+        def new_cycle():
+            cycle = HamiltonianCycle(8, 6)
+            return ArrayCycle.from_cycle(cycle, (8, 6)) if compact else cycle
+
+        field, start = Field(2, 3), Field(2, 0)
+        cycle1, cycle2 = new_cycle().split(field)
+        expected = join_adjoint_cycles(cycle1, cycle2, start, skip=skip)
+
+        cycle = new_cycle()
+        splice = shortcut(cycle, field, start, lambda *_: False, skip=skip)
+
+        assert cycle == expected
+        assert splice.skipped == len(cycle2)
+        assert len(splice.changes) == 4
+
+    @pytest.mark.parametrize("compact", [False, True])
+    def test_rollback(self, compact):
+        cycle = HamiltonianCycle(8, 6)
+        if compact:
+            cycle = ArrayCycle.from_cycle(cycle, (8, 6))
+        expected = cycle.copy()
+
+        splice = shortcut(cycle, Field(2, 3), Field(2, 0), lambda *_: False)
+        splice.rollback()
+        assert cycle == expected
+
+        # every field is blocked, so the skipped fields can't be joined back
+        with pytest.raises(CycleError):
+            shortcut(cycle, Field(2, 3), Field(2, 0), lambda *_: True)
+        assert cycle == expected
+
+
+class TestPositions:
+    @staticmethod
+    def _walk(cycle, start, end):
+        dist = 0
+        while start != end:
+            start += cycle[start]
+            dist += 1
+        return dist
+
+    @staticmethod
+    def _cache(cycle):
+        return cycle.order if isinstance(cycle, ArrayCycle) else cycle.positions()
+
+    @pytest.mark.parametrize("compact", [False, True])
+    def test_patched_by_shortcut_and_rollback(self, compact):
+        cycle = HamiltonianCycle(8, 6)
+        if compact:
+            cycle = ArrayCycle.from_cycle(cycle, (8, 6))
+        cache = self._cache(cycle)
+        start = Field(2, 0)
+
+        splice = shortcut(cycle, Field(2, 3), start, lambda *_: False)
+        # patched, not walked again
+        assert self._cache(cycle) is cache
+        for field in cycle:
+            assert cycle.dist(start, field) == self._walk(cycle, start, field)
+
+        splice.rollback()
+        assert self._cache(cycle) is cache
+        for field in cycle:
+            assert cycle.dist(start, field) == self._walk(cycle, start, field)
+
+    @pytest.mark.parametrize("compact", [False, True])
+    def test_dropped_by_other_writes(self, compact):
+        cycle = HamiltonianCycle(4, 2)
+        if compact:
+            cycle = ArrayCycle.from_cycle(cycle, (4, 2))
+        fields = [Field(0, 0)]
+        while len(fields) < len(cycle):
+            fields.append(fields[-1] + cycle[fields[-1]])
+        version = cycle.version
+        assert cycle.dist(Field(0, 0), Field(0, 1)) == 1
+
+        # reverse the cycle
+        for field, before in zip(fields, fields[-1:] + fields[:-1]):
+            cycle[field] = before.diff(field)
+
+        assert cycle.version == version + 8
+        assert cycle.dist(Field(0, 0), Field(0, 1)) == 7
+
+
+class TestAnytimeCycleAI:
+    def test_zero_budget_takes_no_shortcut(self):
+        board = Board((8, 6), rng=random.Random(0))
+        ai = CycleAI(board, compact=True, budget=0.0)
+        cycle = ai.cycle.copy()
+
+        for _ in range(300):
+            ai.optimize()
+            assert ai.next() == cycle[ai.head]
+            board.snake.turn(ai.next())
+            board.update()
+        assert ai.shortcuts == 0
+
+    def test_latency_within_budget(self, monkeypatch):
+        monkeypatch.setattr(config, "CYCLE_VALIDATION", Validation.OFF)
+        budget = 0.002
+        board = Board((32, 32), rng=random.Random(0))
+        ai = CycleAI(board, compact=True, budget=budget)
+
+        latencies = []
+        for _ in range(300):
+            start = time.perf_counter()
+            ai.optimize()
+            latencies.append(time.perf_counter() - start)
+            board.snake.turn(ai.next())
+            board.update()
+
+        assert ai.shortcuts > 0
+        # a shortcut is only started if it fits, but the scheduler may interrupt it
+        assert sorted(latencies)[int(len(latencies) * 0.9)] <= budget
+
+    @pytest.mark.parametrize("compact", [False, True])
+    def test_wins(self, compact):
+        board = Board((6, 6), rng=random.Random(0))
+        ai = CycleAI(board, compact=compact, budget=0.005)
+
+        with pytest.raises(WinError):
+            for _ in range(2000):
+                ai.optimize()
+                board.snake.turn(ai.next())
+                board.update()
+
+
+class TestExhaustiveCycleAI:
+    def test_needs_compact(self):
+        with pytest.raises(ValueError):
+            CycleAI(Board((6, 6)), exhaustive=True)
+
+    def test_takes_the_longest_shortcut(self):
+        board = Board((8, 6), rng=random.Random(0))
+        ai = CycleAI(board, compact=True, exhaustive=True)
+        moves = ai.cycle.dist(board.snake.head, board.apple)
+        _, skipped = array_shortcuts(ai.cycle, board.snake.head, board.apple)
+
+        ai.optimize()
+        assert ai.shortcuts == 1
+        assert ai.cycle.dist(board.snake.head, board.apple) == moves - max(skipped)
+
+    def test_wins(self):
+        board = Board((6, 6), rng=random.Random(0))
+        ai = CycleAI(board, compact=True, exhaustive=True)
+
+        with pytest.raises(WinError):
+            for _ in range(2000):
+                ai.optimize()
+                board.snake.turn(ai.next())
+                board.update()
+
+
+class TestIdlePath:
+    def _board(self, *body):
+        board = Board((8, 6), rng=random.Random(0))
+        fields = board.fields
+        board.apple = fields[1, 3]
+        board.snake = Snake(fields[0, 0], fields=fields)
+        board.snake.extend(fields[field] for field in body)
+        return board
+
+    def test_ends_at_the_shortcut(self):
+        # the shortcut from (0, 3) to the apple is taken by 'optimize'
+        path = CycleAI(self._board()).idle_path()
+
+        assert path == [Field(0, 1), Field(0, 2), Field(0, 3)]
+
+    def test_ends_before_the_snake(self):
+        path = CycleAI(self._board((0, 2), (2, 0))).idle_path()
+
+        assert path == [Field(0, 1)]
+
+    def test_the_tail_leaves_in_time(self):
+        path = CycleAI(self._board((2, 0), (0, 2))).idle_path()
+
+        assert path == [Field(0, 1), Field(0, 2), Field(0, 3)]
+
+
+class TestJointsInTheSnake:
+    def test_body_is_stamped(self):
+        board = Board((8, 6), rng=random.Random(0))
+        ai = CycleAI(board)
+        for _ in range(40):
+            ai.optimize()
+            board.snake.turn(ai.next())
+            board.update()
+        ai._sync()
+
+        stamps = [ai._entered[ai._index(field)] for field in board.snake]
+        assert stamps == list(range(board.moves, board.moves - len(board.snake), -1))
+
+    @pytest.mark.parametrize("seed", range(4))
+    def test_wins(self, seed):
+        board = Board((6, 6), rng=random.Random(seed))
+        ai = CycleAI(board)
+
+        joints_in_the_snake = 0
+        with pytest.raises(WinError):
+            for _ in range(2000):
+                gap = ai._gap
+                ai.optimize()
+                joints_in_the_snake += ai._gap != gap
+                board.snake.turn(ai.next())
+                board.update()
+        assert joints_in_the_snake > 0
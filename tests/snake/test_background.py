@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from snake.ai_cycle import CycleAI
+from snake.background import BackgroundOptimizer, _plan
+from snake.dtypes import Content
+from snake.exceptions import WinError
+from snake.game import Board
+
+
+class TestBackgroundOptimizer:
+    @pytest.mark.parametrize("compact", [False, True])
+    def test_wins(self, metrics, compact):
+        board = Board((6, 6), rng=random.Random(0))
+        ai = CycleAI(board, compact=compact)
+
+        with BackgroundOptimizer(ai) as optimizer, pytest.raises(WinError):
+            for _ in range(3000):
+                optimizer.step()
+                board.snake.turn(ai.next())
+                board.update()
+                optimizer.wait()
+
+        assert metrics.events["proposal adopted"] > 0
+        assert metrics.events["proposal rejected"] == 0
+
+    def test_rejects_outdated_proposal(self, metrics):
+        board = Board((8, 6), rng=random.Random(0))
+        ai = CycleAI(board, compact=True)
+        snapshot = board.copy()
+
+        with BackgroundOptimizer(ai, lookahead=1) as optimizer:
+            for _ in range(20):
+                optimizer.step()
+                optimizer.wait()
+                # the snake never moves, so it is never where a proposal expects it
+                assert ai.board.snake == snapshot.snake
+
+        assert metrics.events["proposal adopted"] == 0
+
+    def test_proposal_leaves_changed_fields_alone(self):
+        board = Board((8, 6), rng=random.Random(0))
+        ai = CycleAI(board, compact=True)
+        ai.pop_changed()
+
+        proposals = 0
+        for tick in range(40):
+            worker = ai.copy(board.copy(rng=random.Random(0)))
+            proposals += _plan(worker, tick + 2, 2) is not None
+            assert ai.pop_changed() == set()
+
+            board.snake.turn(ai.next())
+            board.update()
+        assert proposals > 0
+
+    def test_copy_is_independent(self):
+        board = Board((8, 6), rng=random.Random(0))
+        snapshot = board.copy()
+
+        snapshot.snake.turn(snapshot.snake.direction)
+        snapshot.update()
+
+        assert snapshot.snake != board.snake
+        assert snapshot.snake.head in board.free
+        assert snapshot.snake.head not in snapshot.free
+        assert board[snapshot.snake.head] is Content.EMPTY
@@ -0,0 +1,51 @@
+import numpy as np
+
+from snake.ai_cycle import HamiltonianCycle
+from snake.batch import APPLE, DIRECTIONS, EMPTY, SNAKE, BatchBoard
+from snake.cycle_array import ArrayCycle
+from snake.dtypes import Direction
+
+
+def _codes(direction: Direction, batch: int) -> np.ndarray:
+    return np.full(batch, DIRECTIONS.index(direction))
+
+
+class TestBatchBoard:
+    def test_init(self):
+        board = BatchBoard(5, (6, 4), seed=0)
+
+        assert board.grid.shape == (5, 6, 4)
+        assert np.all(np.sum(board.cells == SNAKE, axis=1) == 2)
+        assert np.all(np.sum(board.cells == APPLE, axis=1) == 1)
+        assert np.all(np.sum(board.cells == EMPTY, axis=1) == 6 * 4 - 3)
+        assert np.all(board.heads == 3 * 4 + 2)
+
+    def test_turning_around_is_ignored(self):
+        board = BatchBoard(3, (6, 4), seed=0)
+        heads = board.heads
+
+        board.step(_codes(Direction.RIGHT, 3))
+
+        assert np.all(board.heads == heads - 4)
+        assert np.all(np.sum(board.cells == SNAKE, axis=1) == board.length)
+
+    def test_crash_into_wall(self):
+        board = BatchBoard(3, (6, 4), seed=0)
+
+        for _ in range(4):
+            board.step(_codes(Direction.LEFT, 3))
+
+        assert np.all(board.lost)
+        steps = board.steps.copy()
+        board.step(_codes(Direction.LEFT, 3))
+        assert np.all(board.steps == steps)
+
+    def test_cycle_policy_wins(self):
+        cycle = ArrayCycle.from_cycle(HamiltonianCycle(6, 6), (6, 6))
+        board = BatchBoard(50, (6, 6), seed=1)
+
+        board.run_cycle(cycle)
+
+        assert np.all(board.won)
+        assert np.all(board.length == 36)
+        assert np.all(np.sum(board.cells == SNAKE, axis=1) == 36)
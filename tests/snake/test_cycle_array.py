@@ -0,0 +1,148 @@
+import random
+
+import numpy as np
+import pytest
+
+from snake.ai_cycle import (
+    CycleAI,
+    HamiltonianCycle,
+    _admissible_directions,
+    join_adjoint_cycles,
+)
+from snake.cycle_array import ArrayCycle, array_joints, array_shortcuts
+from snake.exceptions import CycleError, InvalidCycleError
+from snake.game import Board, Field
+
+
+class TestArrayCycle:
+    def test_from_cycle(self):
+        cycle = HamiltonianCycle(8, 6)
+        array_cycle = ArrayCycle.from_cycle(cycle, (8, 6))
+
+        assert len(array_cycle) == len(cycle)
+        assert array_cycle == cycle
+        for field in cycle:
+            assert array_cycle[field] == cycle[field]
+
+    def test_invalid(self):
+        succ = np.full(4, -1)
+        succ[0] = 1
+        with pytest.raises(InvalidCycleError):
+            _ = ArrayCycle((2, 2), succ)
+
+    def test_dist(self):
+        cycle = HamiltonianCycle(8, 6)
+        array_cycle = ArrayCycle.from_cycle(cycle, (8, 6))
+
+        fields = list(cycle)
+        for start in fields[::5]:
+            for end in fields[::7]:
+                assert array_cycle.dist(start, end) == cycle.dist(start, end)
+
+    def test_split(self):
+        cycle = HamiltonianCycle(8, 6)
+        array_cycle = ArrayCycle.from_cycle(cycle, (8, 6))
+
+        for field in [Field(2, 3), Field(4, 1), Field(5, 2)]:
+            expected = cycle.split(field)
+            cycle1, cycle2 = array_cycle.split(field)
+            assert cycle1 == expected[0]
+            assert cycle2 == expected[1]
+
+    def test_join(self):
+        cycle = HamiltonianCycle(8, 6)
+        array_cycle = ArrayCycle.from_cycle(cycle, (8, 6))
+
+        cycle1, cycle2 = HamiltonianCycle.split(cycle, Field(2, 3))
+        array_cycle1, array_cycle2 = array_cycle.split(Field(2, 3))
+
+        expected = join_adjoint_cycles(cycle1, cycle2, Field(2, 0))
+        joined = join_adjoint_cycles(array_cycle1, array_cycle2, Field(2, 0))
+
+        assert isinstance(joined, ArrayCycle)
+        assert joined == expected
+        assert len(joined) == 48
+
+    @pytest.mark.parametrize("start", [Field(0, 0), Field(3, 2), Field(7, 5)])
+    def test_shortcuts(self, start):
+        cycle = ArrayCycle.from_cycle(HamiltonianCycle(8, 6), (8, 6))
+        end = Field(4, 4)
+
+        expected = set()
+        field, length = start, cycle.dist(start, end)
+        for rank in range(length):
+            target = field + (_admissible_directions(field) - {cycle[field]}).pop()
+            if target in cycle:
+                ahead = cycle.dist(start, target)
+                if ahead - rank - 1 > 0 and ahead <= length:
+                    expected.add((cycle.index(field), ahead - rank - 1))
+            field += cycle[field]
+
+        cells, skipped = array_shortcuts(cycle, start, end)
+        assert set(zip(cells.tolist(), skipped.tolist())) == expected
+        assert list(skipped) == sorted(skipped, reverse=True)
+
+    @pytest.mark.parametrize("start", [Field(0, 0), Field(1, 4), Field(5, 3)])
+    def test_joints(self, start):
+        cycle = ArrayCycle.from_cycle(HamiltonianCycle(8, 6), (8, 6))
+        field = Field(2, 3)
+        target = field + (_admissible_directions(field) - {cycle[field]}).pop()
+
+        skipped = []
+        _field = field + cycle[field]
+        while _field != target:
+            skipped.append(_field)
+            _field += cycle[_field]
+
+        # the fields after 'start' whose other admissible neighbour is skipped,
+        # 'field' leaves through 'target' after the shortcut
+        expected = []
+        _field = start + cycle[start]
+        while _field != start:
+            other = (_admissible_directions(_field) - {cycle[_field]}).pop()
+            neighbor = _field + (cycle[_field] if _field == field else other)
+            if _field not in skipped and neighbor in skipped:
+                expected.append((cycle.index(_field), cycle.index(neighbor)))
+            _field += cycle[_field]
+
+        index = cycle.index
+        cells, joints, befores = array_joints(
+            cycle, index(field), index(target), index(start)
+        )[1:]
+        assert list(zip(cells.tolist(), joints.tolist())) == expected
+        for joint, before in zip(joints.tolist(), befores.tolist()):
+            loop = skipped[-1:] + skipped[:-1]
+            assert cycle.field(before) == loop[skipped.index(cycle.field(joint))]
+
+    def test_joints_start_is_skipped(self):
+        cycle = ArrayCycle.from_cycle(HamiltonianCycle(8, 6), (8, 6))
+        field = Field(2, 3)
+        target = field + (_admissible_directions(field) - {cycle[field]}).pop()
+
+        with pytest.raises(CycleError):
+            array_joints(
+                cycle,
+                cycle.index(field),
+                cycle.index(target),
+                cycle.index(field + cycle[field]),
+            )
+
+
+class TestCompactCycleAI:
+    def test_same_moves(self):
+        board = Board((8, 6), rng=random.Random(0))
+        compact_board = Board((8, 6), rng=random.Random(0))
+
+        ai = CycleAI(board)
+        compact_ai = CycleAI(compact_board, compact=True)
+
+        for _ in range(200):
+            ai.optimize()
+            compact_ai.optimize()
+            assert ai.next() == compact_ai.next()
+
+            board.snake.turn(ai.next())
+            compact_board.snake.turn(compact_ai.next())
+
+            board.update()
+            compact_board.update()
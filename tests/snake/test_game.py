@@ -0,0 +1,182 @@
+import pickle
+import random
+from collections import Counter
+
+import pytest
+
+from snake.dtypes import Content, Direction
+from snake.exceptions import LoseError
+from snake.game import Board, Field, Fields, Snake
+
+
+class TestFields:
+    def test_interned(self):
+        fields = Fields((4, 3))
+
+        assert fields[1, 2] is fields[1, 2]
+        assert fields[1, 1] + Direction.UP is fields[1, 2]
+        assert fields[1, 2] - Direction.UP is fields[1, 1]
+        assert len(list(fields)) == len(fields) == 12
+
+    @pytest.mark.parametrize("direction", list(Direction))
+    def test_neighbors(self, direction):
+        fields = Fields((4, 3))
+
+        assert direction.opposite().index == direction.index ^ 1
+        assert fields[1, 1] + direction == Field(1, 1) + direction
+        assert fields[1, 1] + direction - direction is fields[1, 1]
+        assert fields[0, 0] - direction == Field(0, 0) - direction
+
+    def test_border(self):
+        fields = Fields((4, 3))
+
+        assert fields[0, 0] + Direction.LEFT is fields[-1, 0]
+        assert fields[-1, 0] + Direction.LEFT == Field(-2, 0)
+        assert fields[7, 7] == Field(7, 7)
+
+    def test_equal_to_plain_fields(self):
+        fields = Fields((4, 3))
+
+        assert fields[2, 1] == Field(2, 1)
+        assert hash(fields[2, 1]) == hash(Field(2, 1))
+        assert pickle.loads(pickle.dumps(fields[2, 1])) == Field(2, 1)
+
+    def test_flat(self):
+        fields = Fields((4, 3))
+
+        for index, field in enumerate(fields.flat):
+            assert index == field.col * 3 + field.row
+
+
+class TestSnake:
+    def test_ring_buffer(self):
+        fields = Fields((4, 3))
+        snake = Snake(fields[1, 1], fields=fields)
+        assert list(snake) == [Field(1, 1), Field(2, 1)]
+
+        # wraps around the end of the buffer several times
+        snake.turn(Direction.UP)
+        for direction in [Direction.UP, Direction.LEFT, Direction.DOWN] * 4:
+            snake.turn(direction)
+            snake.move()
+        snake.grow()
+
+        assert len(snake) == 3
+        assert snake.head == snake[0] == snake[-3]
+        assert list(reversed(snake)) == list(snake)[::-1]
+        assert snake == snake.copy()
+
+    def test_occupied(self):
+        fields = Fields((4, 3))
+        snake = Snake(fields[1, 1], fields=fields)
+        snake.extend([Field(3, 1), Field(3, 2)])
+
+        expected = {fields[1, 1], fields[2, 1], fields[3, 1], fields[3, 2]}
+        for field in fields:
+            assert snake.occupied[field.index] == (field in expected)
+            assert (field in snake) == (field in expected)
+        assert Field(1, 1) in snake
+        assert fields[-1, 1] not in snake
+
+        assert snake.pop() == Field(3, 2)
+        assert Field(3, 2) not in snake
+
+    def test_collision_with_tail(self):
+        fields = Fields((4, 3))
+        snake = Snake(fields[1, 1], fields=fields)
+        snake.extend([fields[2, 2], fields[1, 2]])
+        snake.turn(Direction.UP)
+
+        with pytest.raises(LoseError):
+            snake.move()
+
+    def test_without_fields(self):
+        snake = Snake(Field(1, 1))
+        snake.extend(Field(2, row) for row in range(2, 10))
+
+        assert snake.occupied is None
+        assert len(snake) == 10
+        assert Field(2, 5) in snake
+        assert snake[-1] == Field(2, 9)
+
+
+class TestBoard:
+    def test_snake_uses_interned_fields(self):
+        board = Board((8, 6))
+
+        for field in board.snake:
+            assert field is board.fields[field.col, field.row]
+
+    def test_free_fields(self):
+        board = Board((6, 4), rng=random.Random(0))
+        moves = random.Random(1)
+
+        for _ in range(50):
+            empty = {key for key, value in board.items() if value is Content.EMPTY}
+            assert set(board.free) == empty
+            assert len(board.free) == len(empty)
+            for index, field in enumerate(board.free):
+                assert board._free_index[field] == index
+            for field in board.fields:
+                snake = board[field] is Content.SNAKE
+                assert board.occupied[field.index] == snake
+
+            board.snake.turn(moves.choice(list(Direction)))
+            try:
+                board.update()
+            except LoseError:
+                break
+
+    def test_grid(self):
+        board = Board((6, 4), rng=random.Random(0))
+
+        assert len(board) == len(dict(board)) == 24
+        assert board[Field(3, 2)] is board[board.fields[3, 2]] is Content.SNAKE
+        for field in [board.fields[-1, 0], board.fields[6, 3], Field(10, 10)]:
+            assert field not in board
+            assert board.get(field) is None
+            with pytest.raises(KeyError):
+                board[field]
+            with pytest.raises(KeyError):
+                board[field] = Content.EMPTY
+
+        array = board.array
+        assert array.shape == (6, 4)
+        assert array[board.apple.col, board.apple.row] == Content.APPLE.value
+        assert (array == Content.SNAKE.value).sum() == len(board.snake)
+        assert (array == Content.EMPTY.value).sum() == len(board.free)
+
+    def test_copy_has_its_own_grid(self):
+        board = Board((6, 4), rng=random.Random(0))
+        snapshot = board.copy()
+
+        board.update()
+        assert dict(snapshot) != dict(board)
+        assert board.copy().grid == board.grid
+
+    def test_advance(self):
+        board = Board((6, 4), rng=random.Random(0))
+        expected = board.copy()
+        path = []
+        for direction in [Direction.UP, Direction.LEFT, Direction.LEFT]:
+            expected.snake.turn(direction)
+            expected.update()
+            path.append(expected.snake.head)
+
+        board.advance(path)
+
+        assert board.snake == expected.snake
+        assert board.snake.direction is expected.snake.direction
+        assert board.free == expected.free
+        assert board.grid == expected.grid
+        assert board.moves == expected.moves == 3
+
+    def test_apple_is_uniform(self):
+        rng = random.Random(0)
+        counts = Counter()
+        for _ in range(2000):
+            board = Board((4, 3), rng=rng)
+            counts[board.apple] += 1
+
+        assert len(counts) == 10
+        assert min(counts.values()) > 140
@@ -0,0 +1,77 @@
+import json
+import random
+
+import numpy as np
+
+from snake.ai_cycle import CycleAI
+from snake.game import Board
+from snake.instrumentation import METRICS, count, timed, timer
+
+
+@timed("square")
+def square(x):
+    return x * x
+
+
+class TestMetrics:
+    def test_disabled(self):
+        METRICS.reset()
+
+        assert square(3) == 9
+        count("event")
+        with timer("block"):
+            pass
+
+        assert METRICS.summary() == {"timings": {}, "events": {}}
+
+    def test_enabled(self, metrics):
+        for x in range(10):
+            assert square(x) == x * x
+        count("event")
+        count("event")
+        with timer("block"):
+            pass
+
+        summary = json.loads(metrics.to_json())
+        assert summary["timings"]["square"]["calls"] == 10
+        assert summary["timings"]["block"]["calls"] == 1
+        assert summary["events"] == {"event": 2}
+        assert "square" in str(metrics)
+
+    def test_histogram(self, metrics):
+        for _ in range(25):
+            square(2)
+
+        counts, edges = metrics.histogram("square", bins=5)
+        assert counts.sum() == 25
+        assert len(edges) == 6
+        assert np.all(np.diff(edges) > 0)
+
+    def test_histogram_of_unknown_timer(self, metrics):
+        square(2)
+
+        counts, _ = metrics.histogram("unknown", bins=5)
+        assert counts.sum() == 0
+        assert "unknown" not in metrics.timings
+        assert "square" in str(metrics)
+        assert "unknown" not in json.loads(metrics.to_json())["timings"]
+
+    def test_summary_skips_empty_timers(self, metrics):
+        metrics.timings["empty"] = []
+
+        assert metrics.summary() == {"timings": {}, "events": {}}
+        str(metrics)
+
+    def test_cycle_ai(self, metrics):
+        board = Board((8, 6), rng=random.Random(0))
+        ai = CycleAI(board, compact=True)
+
+        for _ in range(100):
+            ai.optimize()
+            board.snake.turn(ai.next())
+            board.update()
+
+        assert len(metrics.timings["optimize"]) == 100
+        assert len(metrics.timings["board.update"]) == 100
+        assert metrics.timings["dist"]
+        assert sum(metrics.events.values()) > 0
@@ -0,0 +1,32 @@
+import random
+
+import pygame as pg
+import pytest
+
+from snake.ai_cycle import CycleAI
+from snake.config import BOARD_SIZE, WINSIZE
+from snake.game import Board
+from snake.main import draw_board, draw_cycle, redraw
+
+
+class TestRedraw:
+    @pytest.mark.parametrize("compact", [False, True])
+    def test_same_as_drawing_everything(self, compact):
+        board = Board(BOARD_SIZE, rng=random.Random(0))
+        ai = CycleAI(board, compact=compact)
+        screen = pg.Surface(WINSIZE)
+        expected = pg.Surface(WINSIZE)
+
+        for step in range(300):
+            ai.optimize()
+            board.snake.turn(ai.next())
+            rects = redraw(screen, ai, board.update())
+
+            # only the first frame is drawn completely
+            assert (len(rects) == 1) if step == 0 else (len(rects) < 20)
+            if step % 10 == 0:
+                draw_board(expected, board)
+                draw_cycle(expected, ai.cycle)
+                assert pg.image.tobytes(screen, "RGB") == pg.image.tobytes(
+                    expected, "RGB"
+                )
@@ -0,0 +1,80 @@
+import random
+
+import pytest
+
+from snake.ai import SnakeAIv4
+from snake.dtypes import Direction
+from snake.exceptions import LoseError, WinError
+from snake.game import Board, Field
+from snake.planner import INF, Planner
+
+
+def _full(board: Board, admissible: bool) -> list[int]:
+    planner = Planner(board.shape, admissible=admissible)
+    planner.update(board)
+    return planner.dist
+
+
+class TestPlanner:
+    def test_dist(self):
+        board = Board((6, 4), rng=random.Random(0))
+        board.apple = Field(0, 0)
+        planner = Planner((6, 4))
+        planner.update(board)
+
+        for field in board.fields:
+            expected = INF if field in board.snake else field.dist(board.apple)
+            assert planner.dist[planner.index(field)] == expected
+
+    @pytest.mark.parametrize("admissible", [False, True])
+    def test_repair_is_same_as_bfs(self, admissible):
+        moves = random.Random(1)
+        for seed in range(5):
+            board = Board((8, 6), rng=random.Random(seed))
+            planner = Planner((8, 6), admissible=admissible)
+
+            for _ in range(100):
+                planner.update(board)
+                assert planner.dist == _full(board, admissible)
+
+                direction = planner.next_direction(board)
+                if direction is None or moves.random() < 0.3:
+                    direction = moves.choice(list(Direction))
+                board.snake.turn(direction)
+                try:
+                    board.update()
+                except (LoseError, WinError):
+                    break
+
+    def test_path_is_shortest(self):
+        board = Board((8, 6), rng=random.Random(0))
+        board.apple = Field(1, 1)
+        planner = Planner((8, 6))
+
+        path = planner.path(board)
+
+        assert path is not None
+        assert len(path) == board.snake.head.dist(board.apple)
+        field = board.snake.head
+        for direction in path:
+            field += direction
+        assert field == board.apple
+
+    def test_no_path(self):
+        board = Board((4, 3), rng=random.Random(0))
+        board.snake.extend([Field(1, 0), Field(1, 1), Field(1, 2)])
+        board.apple = Field(0, 0)
+
+        assert Planner((4, 3)).next_direction(board) is None
+        assert Planner((4, 3)).path(board) is None
+
+
+class TestSnakeAIv4:
+    def test_wins(self):
+        board = Board((8, 8), rng=random.Random(0))
+        ai = SnakeAIv4(board)
+
+        with pytest.raises(WinError):
+            for _ in range(2000):
+                board.snake.turn(ai.search_best_direction())
+                board.update()
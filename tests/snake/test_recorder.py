@@ -0,0 +1,55 @@
+import shutil
+
+import pygame as pg
+import pytest
+
+from snake.recorder import Recorder, encode_png
+
+
+def _frame(index: int) -> pg.Surface:
+    surface = pg.Surface((37, 20))
+    surface.fill((index, 100, 200))
+    surface.fill((255, 0, index), pg.Rect(3, 5, 10, 4))
+    return surface
+
+
+class TestEncodePng:
+    def test_roundtrip(self, tmp_path):
+        surface = _frame(7)
+        path = tmp_path / "frame.png"
+        path.write_bytes(encode_png(pg.image.tobytes(surface, "RGB"), (37, 20)))
+
+        loaded = pg.image.load(path)
+        assert loaded.get_size() == (37, 20)
+        assert pg.image.tobytes(loaded, "RGB") == pg.image.tobytes(surface, "RGB")
+
+
+class TestRecorder:
+    @pytest.mark.parametrize("maxsize", [1, 64])
+    def test_every_kth_frame(self, tmp_path, maxsize):
+        with Recorder(tmp_path, every=3, workers=2, maxsize=maxsize) as recorder:
+            for index in range(10):
+                recorder.record(_frame(index))
+
+        assert recorder.frames == 10
+        assert recorder.recorded == 4
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            f"img_{index:05d}.png" for index in range(4)
+        ]
+        for index in range(4):
+            loaded = pg.image.load(tmp_path / f"img_{index:05d}.png")
+            expected = _frame(3 * index)
+            assert pg.image.tobytes(loaded, "RGB") == pg.image.tobytes(expected, "RGB")
+
+    def test_every_must_be_positive(self, tmp_path):
+        with pytest.raises(ValueError):
+            Recorder(tmp_path, every=0)
+
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs ffmpeg")
+    def test_video(self, tmp_path):
+        video = tmp_path / "snake.mp4"
+        with Recorder(tmp_path, video=video) as recorder:
+            for index in range(10):
+                recorder.record(_frame(index))
+
+        assert video.stat().st_size > 0
@@ -0,0 +1,157 @@
+import random
+import sys
+
+import pytest
+
+from snake.dtypes import Content, Direction
+from snake.exceptions import LoseError, WinError
+from snake.game import Board, Field, Snake
+from snake.search import PathSearch, plan_is_safe
+
+
+class _Found(Exception):
+    pass
+
+
+def _recursive_search(board: Board, admissible: bool):
+    """The recursive search of 'SnakeAI' and 'SnakeAIv2' that 'PathSearch' replaced.
+
+    Ties are broken by the order of 'Direction' instead of the order of a set.
+    """
+    apple = board.apple
+    path: list[Direction] = []
+    visited: list[Field] = []
+
+    def candidates(start: Field, direction: Direction) -> list[Direction]:
+        directions = [
+            d
+            for d in Direction
+            if (d != direction.opposite())
+            and (start + d not in visited)
+            and (start + d in board)
+            and (board[start + d] != Content.SNAKE)
+        ]
+        if not admissible:
+            directions = sorted(
+                directions,
+                key=lambda d: (
+                    1
+                    if (d == direction)
+                    and (apple.dist(start + direction.opposite()) < apple.dist(start))
+                    else 0
+                ),
+            )
+            return sorted(directions, key=lambda d: apple.dist(start + d))
+
+        parity = {
+            Direction.DOWN if start.col % 2 == 0 else Direction.UP,
+            Direction.RIGHT if start.row % 2 == 0 else Direction.LEFT,
+        }
+        directions = [d for d in directions if d in parity]
+
+        def sort_by_direction(d: Direction) -> int:
+            if d == direction:
+                return 0
+            if apple.dist(start + d) < apple.dist(start):
+                return -1
+            if apple.dist(start + d) > apple.dist(start):
+                return 1
+            return 0
+
+        directions = sorted(directions, key=sort_by_direction)
+        return sorted(directions, key=lambda d: apple.dist(start + d))
+
+    def search(start: Field, direction: Direction):
+        if start == apple:
+            raise _Found
+        visited.append(start)
+        for d in candidates(start, direction):
+            path.append(d)
+            search(start + d, d)
+            path.pop()
+
+    try:
+        search(board.snake.head, board.snake.direction)
+    except _Found:
+        return path
+    return None
+
+
+def _boards(shape: tuple[int, int], games: int, steps: int):
+    moves = random.Random(0)
+    for seed in range(games):
+        board = Board(shape, rng=random.Random(seed))
+        for _ in range(steps):
+            yield board
+            direction = moves.choice(list(Direction))
+            if board.snake.head + direction == board.snake[1]:
+                continue
+            board.snake.turn(direction)
+            try:
+                board.update()
+            except (LoseError, WinError):
+                break
+
+
+class TestPathSearch:
+    @pytest.mark.parametrize("admissible", [False, True])
+    def test_same_as_recursive_search(self, admissible):
+        search = PathSearch((8, 6), admissible=admissible)
+
+        for board in _boards((8, 6), games=10, steps=40):
+            expected = _recursive_search(board, admissible)
+            assert search.search(board, board.snake.direction) == expected
+
+    def test_no_path(self):
+        board = Board((4, 3), rng=random.Random(0))
+        board.snake.extend([Field(1, 0), Field(1, 1), Field(1, 2)])
+        board.apple = Field(0, 0)
+
+        assert PathSearch((4, 3)).search(board, board.snake.direction) is None
+
+    def test_long_path(self):
+        # walls of snake with alternating gaps leave a single, winding path, which
+        # is longer than the recursion limit of the recursive search
+        board = Board((63, 40), rng=random.Random(0))
+        board.snake = Snake(board.fields[0, 0])
+        for col in range(1, 63, 2):
+            gap = 39 if col % 4 == 1 else 0
+            board.snake.extend(Field(col, row) for row in range(40) if row != gap)
+        board.apple = Field(62, 0)
+
+        path = PathSearch((63, 40)).search(board, board.snake.direction)
+
+        assert path is not None
+        assert len(path) > sys.getrecursionlimit()
+
+
+class TestPlanIsSafe:
+    def _board(self) -> Board:
+        # snake from (3, 2) to (4, 2), apple at (5, 1)
+        board = Board((6, 4), rng=random.Random(0))
+        board.apple = Field(5, 1)
+        return board
+
+    def test_path_to_apple(self):
+        board = self._board()
+        plan = [Direction.DOWN, Direction.RIGHT, Direction.RIGHT]
+
+        assert plan_is_safe(board, plan)
+        assert not plan_is_safe(board, plan[:-1])
+        assert not plan_is_safe(board, [])
+
+    def test_off_board(self):
+        board = self._board()
+        board.apple = Field(3, 0)
+
+        assert not plan_is_safe(board, [Direction.DOWN] * 3)
+
+    def test_tail_moves_away(self):
+        board = self._board()
+        board.apple = Field(5, 2)
+
+        # the tail at (4, 2) still blocks the first move ...
+        assert not plan_is_safe(board, [Direction.RIGHT, Direction.RIGHT])
+        # ... but is gone when the head gets there
+        plan = [Direction.UP, Direction.RIGHT, Direction.DOWN, Direction.RIGHT]
+        assert plan_is_safe(board, plan)
@@ -0,0 +1,53 @@
+import subprocess
+import sys
+
+import pytest
+
+from snake.simulator import AIS, Simulator
+
+
+class TestSimulator:
+    def test_no_pygame(self):
+        code = "import sys, snake.simulator; sys.exit('pygame' in sys.modules)"
+        assert subprocess.run([sys.executable, "-c", code]).returncode == 0
+
+    def test_cycle_ai_wins(self):
+        stats = Simulator((6, 6), "cycle", seed=0).run()
+
+        assert stats.won
+        assert not stats.lost
+        assert stats.length == 36
+        assert stats.apples == 34
+
+    def test_seeded(self):
+        stats1 = Simulator((6, 6), "cycle", seed=3).run()
+        stats2 = Simulator((6, 6), "cycle", seed=3).run()
+
+        assert stats1.steps == stats2.steps
+
+    @pytest.mark.parametrize("ai", sorted(AIS))
+    def test_max_steps(self, ai):
+        stats = Simulator((6, 6), ai, seed=0).run(max_steps=10)
+
+        assert stats.steps <= 10
+        assert stats.apples_per_step >= 0
+
+    @pytest.mark.parametrize(
+        "options", [{"compact": False}, {"compact": True}, {"exhaustive": True}]
+    )
+    def test_fast_forward_ends_in_the_same_state(self, options):
+        simulator = Simulator((8, 6), "cycle", seed=1, **options)
+        fast = Simulator((8, 6), "cycle", seed=1, fast_forward=True, **options)
+        stats, fast_stats = simulator.run(), fast.run()
+
+        assert fast_stats.won
+        assert (fast_stats.steps, fast_stats.apples) == (stats.steps, stats.apples)
+        assert len(fast_stats.latencies) < len(stats.latencies)
+        assert list(fast.board.snake) == list(simulator.board.snake)
+        assert fast.board.free == simulator.board.free
+        assert fast.ai.cycle == simulator.ai.cycle
+
+    def test_fast_forward_max_steps(self):
+        stats = Simulator((8, 6), "cycle", seed=0, fast_forward=True).run(max_steps=50)
+
+        assert stats.steps == 50
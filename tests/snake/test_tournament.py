@@ -0,0 +1,46 @@
+import json
+
+from snake import tournament
+from snake.simulator import GameStats
+from snake.tournament import Game, Report, play, run_tournament
+
+
+class TestTournament:
+    def test_play(self):
+        stats = play(Game("cycle", (4, 4), seed=0))
+
+        assert stats.won
+        assert len(stats.latencies) == stats.steps
+
+    def test_run_tournament(self):
+        report = run_tournament(["cycle", "snake"], [(4, 4)], range(3), workers=2)
+
+        summaries = {summary.ai: summary for summary in report.summaries()}
+        assert summaries["cycle"].games == 3
+        assert summaries["cycle"].wins == 3
+        assert summaries["cycle"].latency_p50 <= summaries["cycle"].latency_max
+        assert json.loads(report.to_json())["summaries"]
+        assert "cycle" in str(report)
+
+    def test_timeouts(self):
+        report = Report([play(Game("cycle", (6, 6), seed=0, max_steps=5))])
+
+        (summary,) = report.summaries()
+        assert summary.timeouts == 1
+        assert summary.wins == summary.losses == summary.errors == 0
+
+    def test_default_max_steps(self, monkeypatch):
+        monkeypatch.setattr(tournament, "STEPS_PER_FIELD", 1)
+        stats = play(Game("cycle", (6, 6), seed=0))
+
+        assert stats.steps == 36
+        assert not stats.finished
+
+    def test_json_without_wins(self):
+        lost = GameStats("snake", (4, 4), 0, 3, 0, 2, won=False, lost=True, duration=0)
+        report = Report([lost, lost])
+
+        (summary,) = json.loads(report.to_json())["summaries"]
+        assert summary["losses"] == 2
+        assert summary["steps_to_win"] is None
+        assert summary["latency_p50"] is None